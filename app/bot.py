@@ -1,24 +1,53 @@
 """
 Bot instance initialization
 """
+from functools import lru_cache
+
+import orjson
+
 from aiogram import Bot, Dispatcher
 from aiogram.enums import ParseMode
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
 
 from config import settings
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
-# Initialize bot
-bot = Bot(
-    token=settings.BOT_TOKEN,
-    default=DefaultBotProperties(
-        parse_mode=ParseMode.HTML
+
+def _json_dumps(value) -> str:
+    """Serialize Bot API payloads (reply markups, media) with orjson"""
+    return orjson.dumps(value).decode()
+
+
+@lru_cache(maxsize=1)
+def get_bot() -> Bot:
+    """Create bot instance on first use and return the same instance afterwards"""
+    # Pooled keep-alive HTTP session for Bot API calls
+    session = AiohttpSession(
+        limit=settings.BOT_HTTP_POOL_LIMIT,
+        timeout=settings.BOT_HTTP_TIMEOUT,
+        json_loads=orjson.loads,
+        json_dumps=_json_dumps
     )
-)
 
-# Initialize dispatcher
-dp = Dispatcher()
+    bot = Bot(
+        token=settings.BOT_TOKEN,
+        session=session,
+        default=DefaultBotProperties(
+            parse_mode=ParseMode.HTML
+        )
+    )
+
+    logger.info("Bot initialized")
+    return bot
+
+
+@lru_cache(maxsize=1)
+def get_dp() -> Dispatcher:
+    """Create dispatcher on first use and return the same instance afterwards"""
+    dp = Dispatcher()
 
-logger.info("Bot and Dispatcher initialized")
+    logger.info("Dispatcher initialized")
+    return dp
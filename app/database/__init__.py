@@ -1,22 +1,51 @@
 """Database module"""
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
-from config.settings import DATABASE_URL
+import orjson
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from config.settings import (
+    DATABASE_URL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_RECYCLE,
+    DB_POOL_TIMEOUT,
+    DB_PREPARED_STATEMENT_CACHE_SIZE,
+    DB_QUERY_CACHE_SIZE
+)
 from .models import Base
 
+
+def _json_dumps(value) -> str:
+    """Serialize JSON/JSONB column values with orjson"""
+    return orjson.dumps(value).decode()
+
+
 # Create async engine for bot's own database
 engine = create_async_engine(
     DATABASE_URL,
     echo=False,
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_timeout=DB_POOL_TIMEOUT,
+    # Compiled statement cache shared by all connections of the engine
+    query_cache_size=DB_QUERY_CACHE_SIZE,
+    # orjson for JSONB columns (cart options); asyncpg passes JSON as text
+    json_serializer=_json_dumps,
+    json_deserializer=orjson.loads,
+    connect_args={
+        # JIT compilation only pays off for long analytical queries
+        "server_settings": {"jit": "off"},
+        # SQLAlchemy keeps its own prepared statement cache per connection,
+        # asyncpg's internal one would only duplicate it
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": DB_PREPARED_STATEMENT_CACHE_SIZE
+    }
 )
 
 # Session factory
-SessionLocal = sessionmaker(
+SessionLocal = async_sessionmaker(
     engine,
-    class_=AsyncSession,
     expire_on_commit=False
 )
 
@@ -27,7 +56,16 @@ async def get_db():
         yield session
 
 
+def _missing_tables(sync_conn) -> set[str]:
+    """Names of bot tables that do not exist in the database yet"""
+    existing = set(inspect(sync_conn).get_table_names())
+    return set(Base.metadata.tables) - existing
+
+
 async def init_db():
     """Initialize database tables"""
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+        # One catalog query on a warm database instead of the per-table
+        # probes and DDL checks of create_all
+        if await conn.run_sync(_missing_tables):
+            await conn.run_sync(Base.metadata.create_all)
@@ -0,0 +1,35 @@
+"""
+Declarative bases shared by the database models
+"""
+from sqlalchemy import MetaData
+from sqlalchemy.orm import DeclarativeBase
+
+# Deterministic constraint names, so DDL and future migrations agree
+NAMING_CONVENTION = {
+    "ix": "ix_%(column_0_label)s",
+    "uq": "uq_%(table_name)s_%(column_0_name)s",
+    "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
+    "pk": "pk_%(table_name)s"
+}
+
+# Bot's own PostgreSQL database
+metadata = MetaData(naming_convention=NAMING_CONVENTION)
+
+# OpenCart MySQL database. Kept apart from the bot metadata so that
+# init_db() never tries to create OpenCart tables in PostgreSQL
+opencart_metadata = MetaData(naming_convention=NAMING_CONVENTION)
+
+
+class Base(DeclarativeBase):
+    """Declarative base for the bot's own models"""
+    metadata = metadata
+    # Fetch server-generated timestamps via RETURNING instead of expiring
+    # them, lazy refresh is not possible on an async session
+    __mapper_args__ = {"eager_defaults": True}
+
+
+class OCBase(DeclarativeBase):
+    """Declarative base for OpenCart tables"""
+    metadata = opencart_metadata
+    # Rows are never deleted through the bot, skip the rowcount bookkeeping
+    __mapper_args__ = {"confirm_deleted_rows": False}
@@ -2,32 +2,47 @@
 Database models for the bot's own PostgreSQL database
 """
 from datetime import datetime
-from sqlalchemy import BigInteger, Column, Integer, String, Text, DateTime, Numeric, Boolean, ForeignKey, JSON
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from decimal import Decimal
+from typing import Any
+from sqlalchemy import BigInteger, Index, Integer, String, Text, DateTime, Numeric, Boolean, ForeignKey, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-Base = declarative_base()
+from .base import Base
+
+
+def _utcnow():
+    """Server-side UTC timestamp, matching the naive UTC values the code writes"""
+    return func.timezone("utc", func.now())
 
 
 class User(Base):
     """Telegram user model"""
     __tablename__ = "users"
 
-    id = Column(BigInteger, primary_key=True)  # Telegram user ID
-    opencart_customer_id = Column(Integer, nullable=True, index=True)
-    username = Column(String(255), nullable=True)
-    first_name = Column(String(255), nullable=True)
-    last_name = Column(String(255), nullable=True)
-    phone = Column(String(20), nullable=True)
-    email = Column(String(255), nullable=True)
-    is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)  # Telegram user ID
+    opencart_customer_id: Mapped[int | None] = mapped_column(Integer, nullable=True, unique=True, index=True)
+    username: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    first_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    last_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    phone: Mapped[str | None] = mapped_column(String(20), nullable=True)
+    email: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    is_active: Mapped[bool | None] = mapped_column(Boolean, default=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=_utcnow(), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=_utcnow(), onupdate=_utcnow(), nullable=False)
 
     # Relationships
-    carts = relationship("Cart", back_populates="user", cascade="all, delete-orphan")
-    orders = relationship("Order", back_populates="user", cascade="all, delete-orphan")
-    support_tickets = relationship("SupportTicket", back_populates="user", cascade="all, delete-orphan")
+    # Collections are never loaded implicitly: every User fetch would otherwise
+    # pull all carts, orders and tickets. Use selectinload() where needed.
+    carts: Mapped[list["Cart"]] = relationship(
+        back_populates="user", cascade="all, delete-orphan", passive_deletes=True, lazy="raise_on_sql"
+    )
+    orders: Mapped[list["Order"]] = relationship(
+        back_populates="user", cascade="all, delete-orphan", passive_deletes=True, lazy="raise_on_sql"
+    )
+    support_tickets: Mapped[list["SupportTicket"]] = relationship(
+        back_populates="user", cascade="all, delete-orphan", passive_deletes=True, lazy="raise_on_sql"
+    )
 
     def __repr__(self):
         return f"<User {self.id} ({self.first_name})>"
@@ -37,16 +52,16 @@ class Cart(Base):
     """Shopping cart items"""
     __tablename__ = "cart"
 
-    id = Column(Integer, primary_key=True, autoincrement=True)
-    user_id = Column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    product_id = Column(Integer, nullable=False, index=True)  # OpenCart product_id
-    quantity = Column(Integer, default=1)
-    options = Column(JSON, nullable=True)  # Product options (if any)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    product_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)  # OpenCart product_id
+    quantity: Mapped[int | None] = mapped_column(Integer, default=1)
+    options: Mapped[dict[str, Any] | None] = mapped_column(JSONB, nullable=True)  # Product options (if any)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=_utcnow(), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=_utcnow(), onupdate=_utcnow(), nullable=False)
 
     # Relationships
-    user = relationship("User", back_populates="carts")
+    user: Mapped["User"] = relationship(back_populates="carts", lazy="joined")
 
     def __repr__(self):
         return f"<Cart user={self.user_id} product={self.product_id} qty={self.quantity}>"
@@ -55,55 +70,94 @@ class Cart(Base):
 class Order(Base):
     """Orders created through the bot"""
     __tablename__ = "orders"
-
-    id = Column(Integer, primary_key=True, autoincrement=True)
-    user_id = Column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    opencart_order_id = Column(Integer, nullable=True, index=True)
-    yoomoney_payment_id = Column(String(255), nullable=True)
-    yoomoney_label = Column(String(255), nullable=True, unique=True)
+    __table_args__ = (
+        Index("ix_order_user_status", "user_id", "status"),
+        # Admin stats by status and the recent orders list, newest first
+        Index("ix_orders_status_created_at", "status", "created_at"),
+        Index("ix_orders_created_at", "created_at"),
+        # User's order history pages, newest first
+        Index("ix_orders_user_created_at", "user_id", "created_at", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    opencart_order_id: Mapped[int | None] = mapped_column(Integer, nullable=True, index=True)
+    yoomoney_payment_id: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    yoomoney_label: Mapped[str | None] = mapped_column(String(255), nullable=True, unique=True)
 
     # Order details
-    amount = Column(Numeric(10, 2), nullable=False)
-    status = Column(String(50), default="pending")  # pending, paid, cancelled, refunded, completed
+    amount: Mapped[Decimal] = mapped_column(Numeric(10, 2), nullable=False)
+    status: Mapped[str | None] = mapped_column(String(50), default="pending")  # pending, paid, cancelled, refunded, completed
 
     # Customer information
-    customer_name = Column(String(255), nullable=True)
-    customer_phone = Column(String(20), nullable=True)
-    customer_email = Column(String(255), nullable=True)
+    customer_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    customer_phone: Mapped[str | None] = mapped_column(String(20), nullable=True)
+    customer_email: Mapped[str | None] = mapped_column(String(255), nullable=True)
 
     # Delivery information
-    delivery_address = Column(Text, nullable=True)
-    delivery_comment = Column(Text, nullable=True)
+    delivery_address: Mapped[str | None] = mapped_column(Text, nullable=True)
+    delivery_comment: Mapped[str | None] = mapped_column(Text, nullable=True)
 
-    # Order items (JSON)
-    items = Column(JSON, nullable=False)  # List of {product_id, name, price, quantity}
-
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    paid_at = Column(DateTime, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=_utcnow(), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=_utcnow(), onupdate=_utcnow(), nullable=False)
+    paid_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
 
     # Relationships
-    user = relationship("User", back_populates="orders")
+    user: Mapped["User"] = relationship(back_populates="orders", lazy="joined")
+    # Only order cards and the OpenCart sync need line items: opt in with
+    # joinedload()/selectinload() instead of a second SELECT on every query
+    items: Mapped[list["OrderItem"]] = relationship(
+        back_populates="order",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="raise_on_sql",
+        order_by="OrderItem.id"
+    )
 
     def __repr__(self):
         return f"<Order {self.id} user={self.user_id} amount={self.amount} status={self.status}>"
 
 
+class OrderItem(Base):
+    """Order line items"""
+    __tablename__ = "order_items"
+    __table_args__ = (
+        Index("ix_order_items_order", "order_id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    order_id: Mapped[int] = mapped_column(Integer, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False)
+    product_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)  # OpenCart product_id
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+    model: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    price: Mapped[Decimal] = mapped_column(Numeric(10, 2), nullable=False)
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    # Relationships
+    order: Mapped["Order"] = relationship(back_populates="items")
+
+    def __repr__(self):
+        return f"<OrderItem order={self.order_id} product={self.product_id} qty={self.quantity}>"
+
+
 class SupportTicket(Base):
     """Support tickets from users"""
     __tablename__ = "support_tickets"
-
-    id = Column(Integer, primary_key=True, autoincrement=True)
-    user_id = Column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    message = Column(Text, nullable=False)
-    admin_response = Column(Text, nullable=True)
-    status = Column(String(20), default="open")  # open, answered, closed
-    created_at = Column(DateTime, default=datetime.utcnow)
-    answered_at = Column(DateTime, nullable=True)
-    closed_at = Column(DateTime, nullable=True)
+    __table_args__ = (
+        Index("ix_support_user_status", "user_id", "status"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    message: Mapped[str] = mapped_column(Text, nullable=False)
+    admin_response: Mapped[str | None] = mapped_column(Text, nullable=True)
+    status: Mapped[str | None] = mapped_column(String(20), default="open")  # open, answered, closed
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=_utcnow(), nullable=False)
+    answered_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    closed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
 
     # Relationships
-    user = relationship("User", back_populates="support_tickets")
+    user: Mapped["User"] = relationship(back_populates="support_tickets", lazy="joined")
 
     def __repr__(self):
         return f"<SupportTicket {self.id} user={self.user_id} status={self.status}>"
@@ -2,25 +2,27 @@
 OpenCart database models (read-only access)
 These models map to the existing OpenCart database tables
 """
-from sqlalchemy import Column, Integer, String, Text, Numeric, Boolean, DateTime, SmallInteger
-from sqlalchemy.ext.declarative import declarative_base
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import Integer, String, Text, Numeric, Boolean, DateTime, SmallInteger
+from sqlalchemy.orm import Mapped, mapped_column
 
-OCBase = declarative_base()
+from .base import OCBase
 
 
 class OCCategory(OCBase):
     """OpenCart category table"""
     __tablename__ = "oc_category"
 
-    category_id = Column(Integer, primary_key=True)
-    image = Column(String(255), nullable=True)
-    parent_id = Column(Integer, default=0)
-    top = Column(Boolean, default=False)
-    column = Column(Integer, default=1)
-    sort_order = Column(Integer, default=0)
-    status = Column(Boolean, default=True)
-    date_added = Column(DateTime, nullable=True)
-    date_modified = Column(DateTime, nullable=True)
+    category_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    image: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    parent_id: Mapped[int | None] = mapped_column(Integer, default=0)
+    top: Mapped[bool | None] = mapped_column(Boolean, default=False)
+    column: Mapped[int | None] = mapped_column(Integer, default=1)
+    sort_order: Mapped[int | None] = mapped_column(Integer, default=0)
+    status: Mapped[bool | None] = mapped_column(Boolean, default=True)
+    date_added: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    date_modified: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
 
     def __repr__(self):
         return f"<OCCategory {self.category_id}>"
@@ -30,13 +32,13 @@ class OCCategoryDescription(OCBase):
     """OpenCart category descriptions (multi-language)"""
     __tablename__ = "oc_category_description"
 
-    category_id = Column(Integer, primary_key=True)
-    language_id = Column(Integer, primary_key=True)
-    name = Column(String(255), nullable=False)
-    description = Column(Text, nullable=True)
-    meta_title = Column(String(255), nullable=True)
-    meta_description = Column(String(255), nullable=True)
-    meta_keyword = Column(String(255), nullable=True)
+    category_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    language_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+    description: Mapped[str | None] = mapped_column(Text, nullable=True)
+    meta_title: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    meta_description: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    meta_keyword: Mapped[str | None] = mapped_column(String(255), nullable=True)
 
     def __repr__(self):
         return f"<OCCategoryDescription cat={self.category_id} lang={self.language_id}>"
@@ -46,8 +48,8 @@ class OCCategoryToStore(OCBase):
     """OpenCart category to store mapping"""
     __tablename__ = "oc_category_to_store"
 
-    category_id = Column(Integer, primary_key=True)
-    store_id = Column(Integer, primary_key=True)
+    category_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    store_id: Mapped[int] = mapped_column(Integer, primary_key=True)
 
     def __repr__(self):
         return f"<OCCategoryToStore cat={self.category_id} store={self.store_id}>"
@@ -57,37 +59,37 @@ class OCProduct(OCBase):
     """OpenCart product table"""
     __tablename__ = "oc_product"
 
-    product_id = Column(Integer, primary_key=True)
-    model = Column(String(64), nullable=False)
-    sku = Column(String(64), nullable=True)
-    upc = Column(String(12), nullable=True)
-    ean = Column(String(14), nullable=True)
-    jan = Column(String(13), nullable=True)
-    isbn = Column(String(17), nullable=True)
-    mpn = Column(String(64), nullable=True)
-    location = Column(String(128), nullable=True)
-    quantity = Column(Integer, default=0)
-    stock_status_id = Column(Integer, nullable=True)
-    image = Column(String(255), nullable=True)
-    manufacturer_id = Column(Integer, nullable=True)
-    shipping = Column(Boolean, default=True)
-    price = Column(Numeric(15, 4), nullable=False)
-    points = Column(Integer, default=0)
-    tax_class_id = Column(Integer, nullable=True)
-    date_available = Column(DateTime, nullable=True)
-    weight = Column(Numeric(15, 8), default=0)
-    weight_class_id = Column(Integer, default=0)
-    length = Column(Numeric(15, 8), default=0)
-    width = Column(Numeric(15, 8), default=0)
-    height = Column(Numeric(15, 8), default=0)
-    length_class_id = Column(Integer, default=0)
-    subtract = Column(Boolean, default=True)
-    minimum = Column(Integer, default=1)
-    sort_order = Column(Integer, default=0)
-    status = Column(Boolean, default=False)
-    viewed = Column(Integer, default=0)
-    date_added = Column(DateTime, nullable=True)
-    date_modified = Column(DateTime, nullable=True)
+    product_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    model: Mapped[str] = mapped_column(String(64), nullable=False)
+    sku: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    upc: Mapped[str | None] = mapped_column(String(12), nullable=True)
+    ean: Mapped[str | None] = mapped_column(String(14), nullable=True)
+    jan: Mapped[str | None] = mapped_column(String(13), nullable=True)
+    isbn: Mapped[str | None] = mapped_column(String(17), nullable=True)
+    mpn: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    location: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    quantity: Mapped[int | None] = mapped_column(Integer, default=0)
+    stock_status_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    image: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    manufacturer_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    shipping: Mapped[bool | None] = mapped_column(Boolean, default=True)
+    price: Mapped[Decimal] = mapped_column(Numeric(15, 4), nullable=False)
+    points: Mapped[int | None] = mapped_column(Integer, default=0)
+    tax_class_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    date_available: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    weight: Mapped[Decimal | None] = mapped_column(Numeric(15, 8), default=0)
+    weight_class_id: Mapped[int | None] = mapped_column(Integer, default=0)
+    length: Mapped[Decimal | None] = mapped_column(Numeric(15, 8), default=0)
+    width: Mapped[Decimal | None] = mapped_column(Numeric(15, 8), default=0)
+    height: Mapped[Decimal | None] = mapped_column(Numeric(15, 8), default=0)
+    length_class_id: Mapped[int | None] = mapped_column(Integer, default=0)
+    subtract: Mapped[bool | None] = mapped_column(Boolean, default=True)
+    minimum: Mapped[int | None] = mapped_column(Integer, default=1)
+    sort_order: Mapped[int | None] = mapped_column(Integer, default=0)
+    status: Mapped[bool | None] = mapped_column(Boolean, default=False)
+    viewed: Mapped[int | None] = mapped_column(Integer, default=0)
+    date_added: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    date_modified: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
 
     def __repr__(self):
         return f"<OCProduct {self.product_id} ({self.model})>"
@@ -97,14 +99,14 @@ class OCProductDescription(OCBase):
     """OpenCart product descriptions (multi-language)"""
     __tablename__ = "oc_product_description"
 
-    product_id = Column(Integer, primary_key=True)
-    language_id = Column(Integer, primary_key=True)
-    name = Column(String(255), nullable=False)
-    description = Column(Text, nullable=True)
-    tag = Column(Text, nullable=True)
-    meta_title = Column(String(255), nullable=True)
-    meta_description = Column(String(255), nullable=True)
-    meta_keyword = Column(String(255), nullable=True)
+    product_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    language_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+    description: Mapped[str | None] = mapped_column(Text, nullable=True)
+    tag: Mapped[str | None] = mapped_column(Text, nullable=True)
+    meta_title: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    meta_description: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    meta_keyword: Mapped[str | None] = mapped_column(String(255), nullable=True)
 
     def __repr__(self):
         return f"<OCProductDescription prod={self.product_id} lang={self.language_id}>"
@@ -114,8 +116,8 @@ class OCProductToCategory(OCBase):
     """OpenCart product to category mapping"""
     __tablename__ = "oc_product_to_category"
 
-    product_id = Column(Integer, primary_key=True)
-    category_id = Column(Integer, primary_key=True)
+    product_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    category_id: Mapped[int] = mapped_column(Integer, primary_key=True)
 
     def __repr__(self):
         return f"<OCProductToCategory prod={self.product_id} cat={self.category_id}>"
@@ -125,8 +127,8 @@ class OCProductToStore(OCBase):
     """OpenCart product to store mapping"""
     __tablename__ = "oc_product_to_store"
 
-    product_id = Column(Integer, primary_key=True)
-    store_id = Column(Integer, primary_key=True)
+    product_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    store_id: Mapped[int] = mapped_column(Integer, primary_key=True)
 
     def __repr__(self):
         return f"<OCProductToStore prod={self.product_id} store={self.store_id}>"
@@ -136,28 +138,28 @@ class OCCustomer(OCBase):
     """OpenCart customer table"""
     __tablename__ = "oc_customer"
 
-    customer_id = Column(Integer, primary_key=True)
-    customer_group_id = Column(Integer, nullable=False)
-    store_id = Column(Integer, default=0)
-    language_id = Column(Integer, nullable=False)
-    firstname = Column(String(32), nullable=False)
-    lastname = Column(String(32), nullable=False)
-    email = Column(String(96), nullable=False)
-    telephone = Column(String(32), nullable=False)
-    fax = Column(String(32), nullable=True)
-    password = Column(String(255), nullable=False)
-    salt = Column(String(9), nullable=True)
-    cart = Column(Text, nullable=True)
-    wishlist = Column(Text, nullable=True)
-    newsletter = Column(Boolean, default=False)
-    address_id = Column(Integer, default=0)
-    custom_field = Column(Text, nullable=True)
-    ip = Column(String(40), nullable=True)
-    status = Column(Boolean, default=True)
-    safe = Column(Boolean, default=False)
-    token = Column(Text, nullable=True)
-    code = Column(String(40), nullable=True)
-    date_added = Column(DateTime, nullable=False)
+    customer_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    customer_group_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    store_id: Mapped[int | None] = mapped_column(Integer, default=0)
+    language_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    firstname: Mapped[str] = mapped_column(String(32), nullable=False)
+    lastname: Mapped[str] = mapped_column(String(32), nullable=False)
+    email: Mapped[str] = mapped_column(String(96), nullable=False)
+    telephone: Mapped[str] = mapped_column(String(32), nullable=False)
+    fax: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    password: Mapped[str] = mapped_column(String(255), nullable=False)
+    salt: Mapped[str | None] = mapped_column(String(9), nullable=True)
+    cart: Mapped[str | None] = mapped_column(Text, nullable=True)
+    wishlist: Mapped[str | None] = mapped_column(Text, nullable=True)
+    newsletter: Mapped[bool | None] = mapped_column(Boolean, default=False)
+    address_id: Mapped[int | None] = mapped_column(Integer, default=0)
+    custom_field: Mapped[str | None] = mapped_column(Text, nullable=True)
+    ip: Mapped[str | None] = mapped_column(String(40), nullable=True)
+    status: Mapped[bool | None] = mapped_column(Boolean, default=True)
+    safe: Mapped[bool | None] = mapped_column(Boolean, default=False)
+    token: Mapped[str | None] = mapped_column(Text, nullable=True)
+    code: Mapped[str | None] = mapped_column(String(40), nullable=True)
+    date_added: Mapped[datetime] = mapped_column(DateTime, nullable=False)
 
     def __repr__(self):
         return f"<OCCustomer {self.customer_id} ({self.email})>"
@@ -167,67 +169,67 @@ class OCOrder(OCBase):
     """OpenCart order table"""
     __tablename__ = "oc_order"
 
-    order_id = Column(Integer, primary_key=True)
-    invoice_no = Column(Integer, default=0)
-    invoice_prefix = Column(String(26), nullable=True)
-    store_id = Column(Integer, default=0)
-    store_name = Column(String(64), nullable=True)
-    store_url = Column(String(255), nullable=True)
-    customer_id = Column(Integer, default=0)
-    customer_group_id = Column(Integer, default=0)
-    firstname = Column(String(32), nullable=False)
-    lastname = Column(String(32), nullable=False)
-    email = Column(String(96), nullable=False)
-    telephone = Column(String(32), nullable=False)
-    fax = Column(String(32), nullable=True)
-    custom_field = Column(Text, nullable=True)
-    payment_firstname = Column(String(32), nullable=True)
-    payment_lastname = Column(String(32), nullable=True)
-    payment_company = Column(String(60), nullable=True)
-    payment_address_1 = Column(String(128), nullable=True)
-    payment_address_2 = Column(String(128), nullable=True)
-    payment_city = Column(String(128), nullable=True)
-    payment_postcode = Column(String(10), nullable=True)
-    payment_country = Column(String(128), nullable=True)
-    payment_country_id = Column(Integer, nullable=True)
-    payment_zone = Column(String(128), nullable=True)
-    payment_zone_id = Column(Integer, nullable=True)
-    payment_address_format = Column(Text, nullable=True)
-    payment_custom_field = Column(Text, nullable=True)
-    payment_method = Column(String(128), nullable=True)
-    payment_code = Column(String(128), nullable=True)
-    shipping_firstname = Column(String(32), nullable=True)
-    shipping_lastname = Column(String(32), nullable=True)
-    shipping_company = Column(String(40), nullable=True)
-    shipping_address_1 = Column(String(128), nullable=True)
-    shipping_address_2 = Column(String(128), nullable=True)
-    shipping_city = Column(String(128), nullable=True)
-    shipping_postcode = Column(String(10), nullable=True)
-    shipping_country = Column(String(128), nullable=True)
-    shipping_country_id = Column(Integer, nullable=True)
-    shipping_zone = Column(String(128), nullable=True)
-    shipping_zone_id = Column(Integer, nullable=True)
-    shipping_address_format = Column(Text, nullable=True)
-    shipping_custom_field = Column(Text, nullable=True)
-    shipping_method = Column(String(128), nullable=True)
-    shipping_code = Column(String(128), nullable=True)
-    comment = Column(Text, nullable=True)
-    total = Column(Numeric(15, 4), default=0)
-    order_status_id = Column(Integer, default=0)
-    affiliate_id = Column(Integer, nullable=True)
-    commission = Column(Numeric(15, 4), nullable=True)
-    marketing_id = Column(Integer, nullable=True)
-    tracking = Column(String(64), nullable=True)
-    language_id = Column(Integer, nullable=False)
-    currency_id = Column(Integer, nullable=False)
-    currency_code = Column(String(3), nullable=False)
-    currency_value = Column(Numeric(15, 8), default=1)
-    ip = Column(String(40), nullable=True)
-    forwarded_ip = Column(String(40), nullable=True)
-    user_agent = Column(String(255), nullable=True)
-    accept_language = Column(String(255), nullable=True)
-    date_added = Column(DateTime, nullable=False)
-    date_modified = Column(DateTime, nullable=False)
+    order_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    invoice_no: Mapped[int | None] = mapped_column(Integer, default=0)
+    invoice_prefix: Mapped[str | None] = mapped_column(String(26), nullable=True)
+    store_id: Mapped[int | None] = mapped_column(Integer, default=0)
+    store_name: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    store_url: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    customer_id: Mapped[int | None] = mapped_column(Integer, default=0)
+    customer_group_id: Mapped[int | None] = mapped_column(Integer, default=0)
+    firstname: Mapped[str] = mapped_column(String(32), nullable=False)
+    lastname: Mapped[str] = mapped_column(String(32), nullable=False)
+    email: Mapped[str] = mapped_column(String(96), nullable=False)
+    telephone: Mapped[str] = mapped_column(String(32), nullable=False)
+    fax: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    custom_field: Mapped[str | None] = mapped_column(Text, nullable=True)
+    payment_firstname: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    payment_lastname: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    payment_company: Mapped[str | None] = mapped_column(String(60), nullable=True)
+    payment_address_1: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    payment_address_2: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    payment_city: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    payment_postcode: Mapped[str | None] = mapped_column(String(10), nullable=True)
+    payment_country: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    payment_country_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    payment_zone: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    payment_zone_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    payment_address_format: Mapped[str | None] = mapped_column(Text, nullable=True)
+    payment_custom_field: Mapped[str | None] = mapped_column(Text, nullable=True)
+    payment_method: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    payment_code: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    shipping_firstname: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    shipping_lastname: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    shipping_company: Mapped[str | None] = mapped_column(String(40), nullable=True)
+    shipping_address_1: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    shipping_address_2: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    shipping_city: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    shipping_postcode: Mapped[str | None] = mapped_column(String(10), nullable=True)
+    shipping_country: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    shipping_country_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    shipping_zone: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    shipping_zone_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    shipping_address_format: Mapped[str | None] = mapped_column(Text, nullable=True)
+    shipping_custom_field: Mapped[str | None] = mapped_column(Text, nullable=True)
+    shipping_method: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    shipping_code: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    comment: Mapped[str | None] = mapped_column(Text, nullable=True)
+    total: Mapped[Decimal | None] = mapped_column(Numeric(15, 4), default=0)
+    order_status_id: Mapped[int | None] = mapped_column(Integer, default=0)
+    affiliate_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    commission: Mapped[Decimal | None] = mapped_column(Numeric(15, 4), nullable=True)
+    marketing_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    tracking: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    language_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    currency_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    currency_code: Mapped[str] = mapped_column(String(3), nullable=False)
+    currency_value: Mapped[Decimal | None] = mapped_column(Numeric(15, 8), default=1)
+    ip: Mapped[str | None] = mapped_column(String(40), nullable=True)
+    forwarded_ip: Mapped[str | None] = mapped_column(String(40), nullable=True)
+    user_agent: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    accept_language: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    date_added: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    date_modified: Mapped[datetime] = mapped_column(DateTime, nullable=False)
 
     def __repr__(self):
         return f"<OCOrder {self.order_id}>"
@@ -237,16 +239,16 @@ class OCOrderProduct(OCBase):
     """OpenCart order products"""
     __tablename__ = "oc_order_product"
 
-    order_product_id = Column(Integer, primary_key=True)
-    order_id = Column(Integer, nullable=False)
-    product_id = Column(Integer, nullable=False)
-    name = Column(String(255), nullable=False)
-    model = Column(String(64), nullable=False)
-    quantity = Column(Integer, nullable=False)
-    price = Column(Numeric(15, 4), default=0)
-    total = Column(Numeric(15, 4), default=0)
-    tax = Column(Numeric(15, 4), default=0)
-    reward = Column(Integer, nullable=True)
+    order_product_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    order_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    product_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+    model: Mapped[str] = mapped_column(String(64), nullable=False)
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    price: Mapped[Decimal | None] = mapped_column(Numeric(15, 4), default=0)
+    total: Mapped[Decimal | None] = mapped_column(Numeric(15, 4), default=0)
+    tax: Mapped[Decimal | None] = mapped_column(Numeric(15, 4), default=0)
+    reward: Mapped[int | None] = mapped_column(Integer, nullable=True)
 
     def __repr__(self):
         return f"<OCOrderProduct order={self.order_id} product={self.product_id}>"
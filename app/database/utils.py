@@ -0,0 +1,34 @@
+"""
+Query helpers shared by the bot and OpenCart database layers
+"""
+from typing import Any, AsyncIterator, Sequence
+from sqlalchemy import Result, Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Keeps every IN (...) list well below driver/server bind parameter limits
+IN_BATCH_SIZE = 500
+
+
+async def in_batches(
+    session: AsyncSession,
+    query: Select,
+    column: Any,
+    ids: Sequence[Any],
+    chunk_size: int = IN_BATCH_SIZE
+) -> AsyncIterator[Result]:
+    """
+    Execute query with `column IN (...)` filter split into chunks
+
+    Args:
+        session: Database session
+        query: Base select statement (other filters already applied)
+        column: Column to filter by
+        ids: Values for the IN list
+        chunk_size: Maximum number of values per statement
+
+    Yields:
+        Result of each chunked statement
+    """
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        yield await session.execute(query.where(column.in_(chunk)))
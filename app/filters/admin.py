@@ -6,10 +6,15 @@ from aiogram.types import Message, CallbackQuery
 
 from config import settings
 
+# Snapshot of the admin list, settings do not change at runtime
+_ADMIN_IDS: frozenset[int] = frozenset(settings.ADMIN_IDS)
+
 
 class IsAdmin(Filter):
     """Filter to check if user is admin"""
 
+    # Kept as a coroutine on purpose: aiogram always awaits Filter subclasses,
+    # and plain sync filter callables are dispatched to a thread executor
     async def __call__(self, event: Message | CallbackQuery) -> bool:
         """Check if user ID is in admin list"""
-        return event.from_user.id in settings.ADMIN_IDS
+        return event.from_user.id in _ADMIN_IDS
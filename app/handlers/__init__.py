@@ -1,19 +1,21 @@
 """Handlers module"""
-from . import start
-from . import catalog
-from . import cart
-from . import checkout
-from . import payment
-from . import admin
-from . import support
+from aiogram import Dispatcher
 
-# Export all routers
-routers = [
-    start.router,
-    catalog.router,
-    cart.router,
-    checkout.router,
-    payment.router,
-    admin.router,
-    support.router,
-]
+
+def register_routers(dp: Dispatcher) -> int:
+    """
+    Import handler modules and include their routers into dispatcher
+
+    Handler modules are imported lazily so that importing the package
+    does not pull in every handler and its dependencies.
+
+    Returns:
+        Number of registered routers
+    """
+    from . import start, catalog, cart, checkout, payment, admin, support, errors
+
+    modules = (start, catalog, cart, checkout, payment, admin, support, errors)
+    for module in modules:
+        dp.include_router(module.router)
+
+    return len(modules)
@@ -1,18 +1,21 @@
 """
 Admin panel handlers
 """
+import asyncio
+import re
+
 from aiogram import Router, F
+from aiolimiter import AsyncLimiter
+from aiogram.exceptions import TelegramRetryAfter
 from aiogram.filters import Command
-from aiogram.types import Message, CallbackQuery
+from aiogram.types import Message, CallbackQuery, LinkPreviewOptions
 from aiogram.fsm.context import FSMContext
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
 
 from app.filters.admin import IsAdmin
 from app.states.admin import AdminStates
 from app.services.order import order_service
 from app.services.user import user_service
-from app.database.models import Order, User, SupportTicket
 from app.keyboards.inline import (
     admin_menu_keyboard,
     admin_order_keyboard,
@@ -20,27 +23,68 @@ from app.keyboards.inline import (
     back_to_main_menu_keyboard
 )
 from app.utils.logger import get_logger
-from app.utils.formatting import format_order_summary, format_date, format_price
-from app.bot import bot
+from app.utils.formatting import format_order_summary, format_date, format_price, get_status_emoji
+from app.bot import get_bot
 
 logger = get_logger(__name__)
 
+# Parallel sends during broadcast
+BROADCAST_CONCURRENCY = 25
+# Telegram allows a bot about 30 messages per second overall; staying just
+# under it keeps broadcasts from stalling on 429 retry_after pauses
+BROADCAST_RATE_LIMIT = AsyncLimiter(28, 1)
+# User IDs buffered between the database cursor and the senders
+BROADCAST_QUEUE_SIZE = 200
+# Link previews make Telegram fetch the page before answering each send
+NO_LINK_PREVIEW = LinkPreviewOptions(is_disabled=True)
+# Seconds between broadcast progress edits
+BROADCAST_PROGRESS_INTERVAL = 2
+
+# /order_<id> links from the orders list
+ORDER_COMMAND_PATTERN = re.compile(r"^/order_(\d+)$")
+
+ADMIN_PANEL_TEXT = """
+⚙️ <b>Админ-панель</b>
+
+Выберите раздел:
+"""
+
+BROADCAST_PROMPT_TEXT = """
+📢 <b>Рассылка сообщения</b>
+
+Введите текст сообщения для рассылки всем пользователям:
+
+⚠️ Будьте осторожны! Сообщение будет отправлено всем пользователям бота.
+"""
+
+# Strong references to fire-and-forget notification tasks
+_background_tasks: set[asyncio.Task] = set()
+
 router = Router()
 router.message.filter(IsAdmin())
 router.callback_query.filter(IsAdmin())
 
 
+async def _send_notification(user_id: int, text: str) -> None:
+    """Send message to user, logging failures (e.g. bot blocked)"""
+    try:
+        await get_bot().send_message(user_id, text, parse_mode="HTML")
+    except Exception as e:
+        logger.warning(f"Failed to notify user {user_id}: {e}")
+
+
+def _notify_user(user_id: int, text: str) -> None:
+    """Schedule a user notification in the background"""
+    task = asyncio.create_task(_send_notification(user_id, text))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
 @router.message(Command("admin"))
 async def admin_panel(message: Message):
     """Show admin panel"""
-    text = """
-⚙️ <b>Админ-панель</b>
-
-Выберите раздел:
-"""
-
     await message.answer(
-        text,
+        ADMIN_PANEL_TEXT,
         reply_markup=admin_menu_keyboard(),
         parse_mode="HTML"
     )
@@ -49,14 +93,8 @@ async def admin_panel(message: Message):
 @router.callback_query(F.data == "admin:menu")
 async def admin_menu_callback(callback: CallbackQuery):
     """Show admin menu"""
-    text = """
-⚙️ <b>Админ-панель</b>
-
-Выберите раздел:
-"""
-
     await callback.message.edit_text(
-        text,
+        ADMIN_PANEL_TEXT,
         reply_markup=admin_menu_keyboard(),
         parse_mode="HTML"
     )
@@ -80,27 +118,20 @@ async def admin_orders(callback: CallbackQuery, db: AsyncSession):
             await callback.answer()
             return
 
-        text = "📋 <b>Последние заказы:</b>\n\n"
+        parts = ["📋 <b>Последние заказы:</b>\n\n"]
 
         for order in orders:
-            status_emoji = {
-                "pending": "⏳",
-                "paid": "✅",
-                "cancelled": "❌",
-                "refunded": "💸",
-                "completed": "🎉"
-            }.get(order.status, "❓")
-
             user_name = order.user.first_name if order.user else "Unknown"
 
-            text += f"""
-{status_emoji} <b>#{order.id}</b> | {user_name} | {format_price(order.amount)}
+            parts.append(f"""
+{get_status_emoji(order.status)} <b>#{order.id}</b> | {user_name} | {format_price(order.amount)}
 📅 {format_date(order.created_at)}
 /order_{order.id}
 
-"""
+""")
 
-        text += "\nНажмите /order_ID для просмотра деталей"
+        parts.append("\nНажмите /order_ID для просмотра деталей")
+        text = "".join(parts)
 
         await callback.message.edit_text(
             text,
@@ -115,12 +146,11 @@ async def admin_orders(callback: CallbackQuery, db: AsyncSession):
         await callback.answer("❌ Произошла ошибка", show_alert=True)
 
 
-@router.message(Command(commands=["order"]), F.text.regexp(r"/order_(\d+)"))
-async def admin_order_details(message: Message, db: AsyncSession):
+@router.message(F.text.regexp(ORDER_COMMAND_PATTERN).as_("order_match"))
+async def admin_order_details(message: Message, db: AsyncSession, order_match: re.Match):
     """Show order details"""
     try:
-        # Extract order ID from command
-        order_id = int(message.text.split("_")[1])
+        order_id = int(order_match.group(1))
 
         order = await order_service.get_order_with_user(db, order_id)
 
@@ -146,28 +176,19 @@ async def admin_order_details(message: Message, db: AsyncSession):
         await message.answer("❌ Произошла ошибка")
 
 
-@router.callback_query(F.data.startswith("admin:complete:"))
-async def admin_complete_order(callback: CallbackQuery, db: AsyncSession):
+async def admin_complete_order(callback: CallbackQuery, order_id: int, db: AsyncSession, state: FSMContext):
     """Mark order as completed"""
     try:
-        order_id = int(callback.data.split(":")[2])
-
-        success = await order_service.update_status(db, order_id, "completed")
+        order = await order_service.update_status(db, order_id, "completed")
 
-        if success:
+        if order:
             await callback.answer("✅ Заказ отмечен как выполненный", show_alert=True)
 
-            # Notify customer
-            order = await order_service.get_order_with_user(db, order_id)
-            if order:
-                try:
-                    await bot.send_message(
-                        order.user_id,
-                        f"✅ <b>Заказ #{order.id} выполнен!</b>\n\nСпасибо за покупку!",
-                        parse_mode="HTML"
-                    )
-                except:
-                    pass
+            # Notify customer without holding up the admin's view
+            _notify_user(
+                order.user_id,
+                f"✅ <b>Заказ #{order.id} выполнен!</b>\n\nСпасибо за покупку!"
+            )
 
             # Refresh view
             text = format_order_summary(order)
@@ -184,28 +205,19 @@ async def admin_complete_order(callback: CallbackQuery, db: AsyncSession):
         await callback.answer("❌ Произошла ошибка", show_alert=True)
 
 
-@router.callback_query(F.data.startswith("admin:cancel:"))
-async def admin_cancel_order(callback: CallbackQuery, db: AsyncSession):
+async def admin_cancel_order(callback: CallbackQuery, order_id: int, db: AsyncSession, state: FSMContext):
     """Cancel order"""
     try:
-        order_id = int(callback.data.split(":")[2])
+        order = await order_service.update_status(db, order_id, "cancelled")
 
-        success = await order_service.update_status(db, order_id, "cancelled")
-
-        if success:
+        if order:
             await callback.answer("❌ Заказ отменен", show_alert=True)
 
-            # Notify customer
-            order = await order_service.get_order_with_user(db, order_id)
-            if order:
-                try:
-                    await bot.send_message(
-                        order.user_id,
-                        f"❌ <b>Заказ #{order.id} отменен</b>\n\nПо всем вопросам обращайтесь в поддержку.",
-                        parse_mode="HTML"
-                    )
-                except:
-                    pass
+            # Notify customer without holding up the admin's view
+            _notify_user(
+                order.user_id,
+                f"❌ <b>Заказ #{order.id} отменен</b>\n\nПо всем вопросам обращайтесь в поддержку."
+            )
 
             # Refresh view
             text = format_order_summary(order)
@@ -222,12 +234,9 @@ async def admin_cancel_order(callback: CallbackQuery, db: AsyncSession):
         await callback.answer("❌ Произошла ошибка", show_alert=True)
 
 
-@router.callback_query(F.data.startswith("admin:msg:"))
-async def admin_message_user_start(callback: CallbackQuery, state: FSMContext):
+async def admin_message_user_start(callback: CallbackQuery, user_id: int, db: AsyncSession, state: FSMContext):
     """Start sending message to user"""
     try:
-        user_id = int(callback.data.split(":")[2])
-
         await state.set_state(AdminStates.waiting_message_to_user)
         await state.update_data(target_user_id=user_id)
 
@@ -243,6 +252,22 @@ async def admin_message_user_start(callback: CallbackQuery, state: FSMContext):
         await callback.answer("❌ Произошла ошибка", show_alert=True)
 
 
+# Actions on an order card, callback data is admin:<action>:<id>
+ADMIN_ACTIONS = {
+    "complete": admin_complete_order,
+    "cancel": admin_cancel_order,
+    "msg": admin_message_user_start
+}
+ADMIN_ACTION_PATTERN = re.compile(rf"^admin:({'|'.join(ADMIN_ACTIONS)}):(\d+)$")
+
+
+@router.callback_query(F.data.regexp(ADMIN_ACTION_PATTERN).as_("action_match"))
+async def admin_action(callback: CallbackQuery, db: AsyncSession, state: FSMContext, action_match: re.Match):
+    """Dispatch order card actions with one filter check"""
+    action, target_id = action_match.groups()
+    await ADMIN_ACTIONS[action](callback, int(target_id), db, state)
+
+
 @router.message(AdminStates.waiting_message_to_user)
 async def admin_send_message_to_user(message: Message, state: FSMContext):
     """Send message to user"""
@@ -257,7 +282,7 @@ async def admin_send_message_to_user(message: Message, state: FSMContext):
 
         # Send message to user
         try:
-            await bot.send_message(
+            await get_bot().send_message(
                 target_user_id,
                 f"📨 <b>Сообщение от администрации:</b>\n\n{message.text}",
                 parse_mode="HTML"
@@ -286,25 +311,21 @@ async def admin_send_message_to_user(message: Message, state: FSMContext):
 async def admin_users(callback: CallbackQuery, db: AsyncSession):
     """Show users statistics"""
     try:
-        # Get total users count
-        query = select(func.count(User.id))
-        result = await db.execute(query)
-        total_users = result.scalar()
+        total_users, users = await user_service.get_recent_users_with_total(db, limit=10)
 
-        # Get recent users
-        users = await user_service.get_all_users(db, limit=10)
-
-        text = f"""
+        parts = [f"""
 👥 <b>Пользователи</b>
 
 📊 Всего пользователей: {total_users}
 
 <b>Последние регистрации:</b>
 
-"""
+"""]
 
         for user in users:
-            text += f"• {user.first_name} (@{user.username or 'no username'}) - {format_date(user.created_at)}\n"
+            parts.append(f"• {user.first_name} (@{user.username or 'no username'}) - {format_date(user.created_at)}\n")
+
+        text = "".join(parts)
 
         await callback.message.edit_text(
             text,
@@ -323,35 +344,27 @@ async def admin_users(callback: CallbackQuery, db: AsyncSession):
 async def admin_stats(callback: CallbackQuery, db: AsyncSession):
     """Show statistics"""
     try:
-        # Total users
-        query = select(func.count(User.id))
-        result = await db.execute(query)
-        total_users = result.scalar()
-
-        # Total orders
-        query = select(func.count(Order.id))
-        result = await db.execute(query)
-        total_orders = result.scalar()
-
-        # Total revenue (paid orders)
-        query = select(func.sum(Order.amount)).where(Order.status == "paid")
-        result = await db.execute(query)
-        total_revenue = result.scalar() or 0
-
-        # Pending orders
-        query = select(func.count(Order.id)).where(Order.status == "pending")
-        result = await db.execute(query)
-        pending_orders = result.scalar()
-
-        text = f"""
+        stats = await order_service.get_stats(db)
+
+        parts = [f"""
 📊 <b>Статистика</b>
 
-👥 Всего пользователей: {total_users}
-📦 Всего заказов: {total_orders}
-⏳ Ожидают оплаты: {pending_orders}
+👥 Всего пользователей: {stats['total_users']}
+📦 Всего заказов: {stats['total_orders']}
+⏳ Ожидают оплаты: {stats['pending_orders']}
 
-💰 Общая выручка: {format_price(total_revenue)}
-"""
+💰 Общая выручка: {format_price(stats['total_revenue'])}
+"""]
+
+        if stats['top_products']:
+            parts.append("\n🏆 <b>Популярные товары:</b>\n")
+            for position, product in enumerate(stats['top_products'], 1):
+                parts.append(
+                    f"{position}. {product['name']} - {product['quantity']} шт., "
+                    f"{format_price(product['revenue'])}\n"
+                )
+
+        text = "".join(parts)
 
         await callback.message.edit_text(
             text,
@@ -371,16 +384,8 @@ async def admin_broadcast_start(callback: CallbackQuery, state: FSMContext):
     """Start broadcast message"""
     await state.set_state(AdminStates.waiting_broadcast_message)
 
-    text = """
-📢 <b>Рассылка сообщения</b>
-
-Введите текст сообщения для рассылки всем пользователям:
-
-⚠️ Будьте осторожны! Сообщение будет отправлено всем пользователям бота.
-"""
-
     await callback.message.edit_text(
-        text,
+        BROADCAST_PROMPT_TEXT,
         parse_mode="HTML"
     )
 
@@ -391,34 +396,70 @@ async def admin_broadcast_start(callback: CallbackQuery, state: FSMContext):
 async def admin_broadcast_send(message: Message, state: FSMContext, db: AsyncSession):
     """Send broadcast message"""
     try:
-        broadcast_text = message.text
-
-        # Get all users
-        users = await user_service.get_all_users(db, limit=10000)
+        # Built once and shared by every send
+        broadcast_text = f"📢 <b>Сообщение от администрации:</b>\n\n{message.text}"
 
+        bot = get_bot()
+        queue: asyncio.Queue[int | None] = asyncio.Queue(maxsize=BROADCAST_QUEUE_SIZE)
+        total = 0
         success_count = 0
         fail_count = 0
 
         status_message = await message.answer("📤 Начинаю рассылку...")
 
-        for user in users:
-            try:
-                await bot.send_message(
-                    user.id,
-                    f"📢 <b>Сообщение от администрации:</b>\n\n{broadcast_text}",
-                    parse_mode="HTML"
-                )
-                success_count += 1
-
-                # Update status every 10 users
-                if success_count % 10 == 0:
-                    await status_message.edit_text(
-                        f"📤 Рассылка: {success_count}/{len(users)}"
-                    )
+        async def send(user_id: int) -> bool:
+            while True:
+                try:
+                    async with BROADCAST_RATE_LIMIT:
+                        await bot.send_message(
+                            user_id,
+                            broadcast_text,
+                            parse_mode="HTML",
+                            link_preview_options=NO_LINK_PREVIEW
+                        )
+                    return True
+                except TelegramRetryAfter as e:
+                    # Flood control: wait and retry the same user
+                    await asyncio.sleep(e.retry_after)
+                except Exception as send_error:
+                    logger.warning(f"Failed to send broadcast to user {user_id}: {send_error}")
+                    return False
+
+        async def worker():
+            nonlocal success_count, fail_count
+            while (user_id := await queue.get()) is not None:
+                if await send(user_id):
+                    success_count += 1
+                else:
+                    fail_count += 1
+
+        async def report_progress():
+            reported = 0
+            while True:
+                await asyncio.sleep(BROADCAST_PROGRESS_INTERVAL)
+                if success_count == reported:
+                    continue
+                reported = success_count
+                try:
+                    await status_message.edit_text(f"📤 Рассылка: {success_count}/{total}")
+                except Exception as edit_error:
+                    logger.warning(f"Failed to update broadcast progress: {edit_error}")
 
-            except Exception as send_error:
-                logger.warning(f"Failed to send broadcast to user {user.id}: {send_error}")
-                fail_count += 1
+        workers = [asyncio.create_task(worker()) for _ in range(BROADCAST_CONCURRENCY)]
+        progress_task = asyncio.create_task(report_progress())
+        try:
+            # Feed user IDs as they come from the database cursor
+            async for user_id in user_service.stream_user_ids(db):
+                total += 1
+                await queue.put(user_id)
+
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            progress_task.cancel()
+            for task in workers:
+                task.cancel()
 
         await status_message.edit_text(
             f"""
@@ -1,30 +1,40 @@
 """
 Shopping cart handlers
 """
+import re
+
 from aiogram import Router, F
 from aiogram.types import CallbackQuery
-from aiogram.exceptions import TelegramBadRequest
+from aiogram.fsm.context import FSMContext
 
 from app.services.cart import cart_service
 from app.services.opencart import opencart_service
 from app.keyboards.inline import cart_keyboard, back_to_main_menu_keyboard
 from app.utils.logger import get_logger
-from app.utils.formatting import format_cart_summary
+from app.utils.cbdata import parse_id
+from app.utils.formatting import EMPTY_CART_TEXT, format_cart_summary
+from app.utils.render import render_response
 
 logger = get_logger(__name__)
 
 router = Router()
 
 
+async def _drop_checkout_cart(state: FSMContext) -> None:
+    """Forget the cart snapshot of an active checkout after the cart changed"""
+    if await state.get_state() is not None:
+        await state.update_data(cart=None)
+
+
 @router.callback_query(F.data.startswith("addcart:"))
-async def add_to_cart(callback: CallbackQuery):
+async def add_to_cart(callback: CallbackQuery, state: FSMContext):
     """Add product to cart"""
     try:
-        product_id = int(callback.data.split(":")[1])
+        product_id = parse_id(callback.data)
         user_id = callback.from_user.id
 
-        # Get product details to verify it exists and is in stock
-        product = await opencart_service.get_product_details(product_id)
+        # Verify product exists and is in stock (cached for a few seconds)
+        product = await opencart_service.get_product_availability(product_id)
 
         if not product:
             await callback.answer("❌ Товар не найден", show_alert=True)
@@ -38,6 +48,8 @@ async def add_to_cart(callback: CallbackQuery):
         success = await cart_service.add_item(user_id, product_id, quantity=1)
 
         if success:
+            await _drop_checkout_cart(state)
+
             # Get cart count
             count = await cart_service.get_item_count(user_id)
             await callback.answer(
@@ -62,35 +74,13 @@ async def show_cart(callback: CallbackQuery):
         cart = await cart_service.get_cart(user_id)
 
         if not cart["items"]:
-            text = "🛒 <b>Ваша корзина пуста</b>\n\nДобавьте товары из каталога."
+            text = EMPTY_CART_TEXT
             keyboard = back_to_main_menu_keyboard()
         else:
             text = format_cart_summary(cart)
             keyboard = cart_keyboard(has_items=True)
 
-        # Check if current message has photo
-        has_photo = callback.message.photo is not None and len(callback.message.photo) > 0
-
-        if has_photo:
-            # Delete photo message and send text
-            await callback.message.delete()
-            await callback.message.answer(
-                text,
-                reply_markup=keyboard,
-                parse_mode="HTML"
-            )
-        else:
-            try:
-                await callback.message.edit_text(
-                    text,
-                    reply_markup=keyboard,
-                    parse_mode="HTML"
-                )
-            except TelegramBadRequest as e:
-                if "message is not modified" in str(e):
-                    pass
-                else:
-                    raise
+        await render_response(callback, text, keyboard)
 
         await callback.answer()
 
@@ -99,31 +89,18 @@ async def show_cart(callback: CallbackQuery):
         await callback.answer("Произошла ошибка при загрузке корзины", show_alert=True)
 
 
-@router.callback_query(F.data.startswith("cart_inc:"))
-async def cart_increase_quantity(callback: CallbackQuery):
+async def cart_increase_quantity(callback: CallbackQuery, product_id: int):
     """Increase product quantity in cart"""
     try:
-        product_id = int(callback.data.split(":")[1])
         user_id = callback.from_user.id
 
-        # Get current cart
-        cart = await cart_service.get_cart(user_id)
-
-        # Find the item
-        current_qty = 0
-        for item in cart["items"]:
-            if item["product_id"] == product_id:
-                current_qty = item["quantity"]
-                break
+        # Increase quantity
+        new_qty = await cart_service.change_quantity(user_id, product_id, 1)
 
-        if current_qty == 0:
+        if not new_qty:
             await callback.answer("Товар не найден в корзине", show_alert=True)
             return
 
-        # Increase quantity
-        new_qty = current_qty + 1
-        await cart_service.update_quantity(user_id, product_id, new_qty)
-
         # Refresh cart display
         cart = await cart_service.get_cart(user_id)
         text = format_cart_summary(cart)
@@ -141,43 +118,28 @@ async def cart_increase_quantity(callback: CallbackQuery):
         await callback.answer("Произошла ошибка", show_alert=True)
 
 
-@router.callback_query(F.data.startswith("cart_dec:"))
-async def cart_decrease_quantity(callback: CallbackQuery):
+async def cart_decrease_quantity(callback: CallbackQuery, product_id: int):
     """Decrease product quantity in cart"""
     try:
-        product_id = int(callback.data.split(":")[1])
         user_id = callback.from_user.id
 
-        # Get current cart
-        cart = await cart_service.get_cart(user_id)
+        # Decrease quantity, the item is removed when it reaches zero
+        new_qty = await cart_service.change_quantity(user_id, product_id, -1)
 
-        # Find the item
-        current_qty = 0
-        for item in cart["items"]:
-            if item["product_id"] == product_id:
-                current_qty = item["quantity"]
-                break
-
-        if current_qty == 0:
+        if new_qty is None:
             await callback.answer("Товар не найден в корзине", show_alert=True)
             return
 
-        # Decrease quantity
-        new_qty = current_qty - 1
-
-        if new_qty <= 0:
-            # Remove from cart
-            await cart_service.remove_item(user_id, product_id)
+        if new_qty == 0:
             await callback.answer("🗑 Товар удален из корзины")
         else:
-            await cart_service.update_quantity(user_id, product_id, new_qty)
             await callback.answer(f"✅ Количество уменьшено: {new_qty}")
 
         # Refresh cart display
         cart = await cart_service.get_cart(user_id)
 
         if not cart["items"]:
-            text = "🛒 <b>Ваша корзина пуста</b>\n\nДобавьте товары из каталога."
+            text = EMPTY_CART_TEXT
             keyboard = back_to_main_menu_keyboard()
         else:
             text = format_cart_summary(cart)
@@ -194,11 +156,9 @@ async def cart_decrease_quantity(callback: CallbackQuery):
         await callback.answer("Произошла ошибка", show_alert=True)
 
 
-@router.callback_query(F.data.startswith("cart_remove:"))
-async def cart_remove_item(callback: CallbackQuery):
+async def cart_remove_item(callback: CallbackQuery, product_id: int):
     """Remove item from cart"""
     try:
-        product_id = int(callback.data.split(":")[1])
         user_id = callback.from_user.id
 
         # Remove from cart
@@ -213,7 +173,7 @@ async def cart_remove_item(callback: CallbackQuery):
         cart = await cart_service.get_cart(user_id)
 
         if not cart["items"]:
-            text = "🛒 <b>Ваша корзина пуста</b>\n\nДобавьте товары из каталога."
+            text = EMPTY_CART_TEXT
             keyboard = back_to_main_menu_keyboard()
         else:
             text = format_cart_summary(cart)
@@ -230,14 +190,32 @@ async def cart_remove_item(callback: CallbackQuery):
         await callback.answer("Произошла ошибка", show_alert=True)
 
 
+# Quantity buttons of a cart item, callback data is cart_<action>:<product_id>
+CART_ACTIONS = {
+    "inc": cart_increase_quantity,
+    "dec": cart_decrease_quantity,
+    "remove": cart_remove_item
+}
+CART_ACTION_PATTERN = re.compile(rf"^cart_({'|'.join(CART_ACTIONS)}):(\d+)$")
+
+
+@router.callback_query(F.data.regexp(CART_ACTION_PATTERN).as_("action_match"))
+async def cart_action(callback: CallbackQuery, action_match: re.Match, state: FSMContext):
+    """Dispatch cart item actions with one filter check"""
+    action, product_id = action_match.groups()
+    await CART_ACTIONS[action](callback, int(product_id))
+    await _drop_checkout_cart(state)
+
+
 @router.callback_query(F.data == "clear_cart")
-async def clear_cart(callback: CallbackQuery):
+async def clear_cart(callback: CallbackQuery, state: FSMContext):
     """Clear entire cart"""
     try:
         user_id = callback.from_user.id
 
         # Clear cart
         await cart_service.clear_cart(user_id)
+        await _drop_checkout_cart(state)
 
         text = "🛒 <b>Корзина очищена</b>\n\nВсе товары удалены из корзины."
 
@@ -1,11 +1,13 @@
 """
 Catalog browsing handlers (categories and products)
 """
+import asyncio
+
 from aiogram import Router, F
-from aiogram.types import CallbackQuery, InputMediaPhoto
-from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import CallbackQuery
 
 from app.services.opencart import opencart_service
+from app.services.photo import photo_cache_service
 from app.keyboards.inline import (
     categories_keyboard,
     products_keyboard,
@@ -13,13 +15,29 @@ from app.keyboards.inline import (
     back_to_main_menu_keyboard
 )
 from app.utils.logger import get_logger
+from app.utils.cbdata import parse_id, parse_id_page
 from app.utils.formatting import format_product_card
+from app.utils.render import render_response, safe_edit_text
 from config import settings
 
 logger = get_logger(__name__)
 
 router = Router()
 
+# Settings snapshot for the pagination hot path
+_PER_PAGE: int = settings.PRODUCTS_PER_PAGE
+_PRODUCT_URL = (settings.OPENCART_URL + "/index.php?route=product/product&product_id={}").format
+_IMAGE_URL = (settings.OPENCART_URL + "/image/{}").format
+
+CATALOG_EMPTY_TEXT = "📂 <b>Каталог пуст</b>\n\nВ данный момент категории не доступны."
+CATALOG_CATEGORIES_TEXT = "📂 <b>Каталог товаров</b>\n\nВыберите категорию:"
+CATALOG_PRODUCTS_TEXT = "📂 <b>Каталог товаров</b>\n\nВыберите товар:"
+CATALOG_NO_PRODUCTS_TEXT = "📂 <b>Каталог</b>\n\n😔 В данный момент товары не доступны."
+# Filled from the category dict with format_map
+CATEGORY_SUBCATEGORIES_TEMPLATE = "📁 <b>{name}</b>\n\nВыберите подкатегорию:"
+CATEGORY_PRODUCTS_TEMPLATE = "📁 <b>{name}</b>\n\nВыберите товар:"
+CATEGORY_EMPTY_TEMPLATE = "📁 <b>{name}</b>\n\n😔 В этой категории пока нет товаров."
+
 
 @router.callback_query(F.data == "catalog")
 async def show_catalog(callback: CallbackQuery):
@@ -28,161 +46,47 @@ async def show_catalog(callback: CallbackQuery):
         categories = await opencart_service.get_root_categories()
 
         if not categories:
-            # Check if current message has photo
-            has_photo = callback.message.photo is not None and len(callback.message.photo) > 0
+            text = CATALOG_EMPTY_TEXT
+            await render_response(callback, text, back_to_main_menu_keyboard())
+            await callback.answer()
+            return
 
-            text = "📂 <b>Каталог пуст</b>\n\nВ данный момент категории не доступны."
-            keyboard = back_to_main_menu_keyboard()
+        # Find "Магазин" category by name
+        shop_category = await opencart_service.get_root_category_by_name("магазин")
 
-            if has_photo:
-                await callback.message.delete()
-                await callback.message.answer(
-                    text,
-                    reply_markup=keyboard,
-                    parse_mode="HTML"
-                )
-            else:
-                try:
-                    await callback.message.edit_text(
-                        text,
-                        reply_markup=keyboard,
-                        parse_mode="HTML"
-                    )
-                except TelegramBadRequest as e:
-                    if "message is not modified" in str(e):
-                        pass
-                    else:
-                        raise
+        if not shop_category:
+            # "Магазин" category not found, show all root categories as fallback
+            text = CATALOG_CATEGORIES_TEXT
+            await render_response(callback, text, categories_keyboard(categories))
             await callback.answer()
             return
 
-        # Find "Магазин" category by name
-        shop_category = None
-        for category in categories:
-            if category['name'].lower() == 'магазин':
-                shop_category = category
-                break
-
-        # If "Магазин" category found, redirect to it directly
-        if shop_category:
-            # Get subcategories of "Магазин"
-            shop_category_id = shop_category['category_id']
-            subcategories = await opencart_service.get_subcategories(shop_category_id)
-
-            # Check if current message has photo
-            has_photo = callback.message.photo is not None and len(callback.message.photo) > 0
-
-            if subcategories:
-                # Show subcategories of "Магазин"
-                text = "📂 <b>Каталог товаров</b>\n\nВыберите категорию:"
-                keyboard = categories_keyboard(subcategories, 0)  # parent_id=0 to go back to main menu
-
-                if has_photo:
-                    await callback.message.delete()
-                    await callback.message.answer(
-                        text,
-                        reply_markup=keyboard,
-                        parse_mode="HTML"
-                    )
-                else:
-                    try:
-                        await callback.message.edit_text(
-                            text,
-                            reply_markup=keyboard,
-                            parse_mode="HTML"
-                        )
-                    except TelegramBadRequest as e:
-                        if "message is not modified" in str(e):
-                            pass
-                        else:
-                            raise
-            else:
-                # No subcategories, show products from "Магазин"
-                products = await opencart_service.get_products_by_category(
-                    shop_category_id,
-                    limit=settings.PRODUCTS_PER_PAGE,
-                    offset=0
-                )
-
-                if products:
-                    text = "📂 <b>Каталог товаров</b>\n\nВыберите товар:"
-                    has_next = len(products) == settings.PRODUCTS_PER_PAGE
-                    keyboard = products_keyboard(products, shop_category_id, 0, has_next, 0)
-
-                    if has_photo:
-                        await callback.message.delete()
-                        await callback.message.answer(
-                            text,
-                            reply_markup=keyboard,
-                            parse_mode="HTML"
-                        )
-                    else:
-                        try:
-                            await callback.message.edit_text(
-                                text,
-                                reply_markup=keyboard,
-                                parse_mode="HTML"
-                            )
-                        except TelegramBadRequest as e:
-                            if "message is not modified" in str(e):
-                                pass
-                            else:
-                                raise
-                else:
-                    # No products either
-                    text = "📂 <b>Каталог</b>\n\n😔 В данный момент товары не доступны."
-                    keyboard = back_to_main_menu_keyboard()
-
-                    if has_photo:
-                        await callback.message.delete()
-                        await callback.message.answer(
-                            text,
-                            reply_markup=keyboard,
-                            parse_mode="HTML"
-                        )
-                    else:
-                        try:
-                            await callback.message.edit_text(
-                                text,
-                                reply_markup=keyboard,
-                                parse_mode="HTML"
-                            )
-                        except TelegramBadRequest as e:
-                            if "message is not modified" in str(e):
-                                pass
-                            else:
-                                raise
+        # Redirect to "Магазин" directly: its subcategories, or its products.
+        # Both are fetched concurrently; the unused one is the price of one RTT.
+        shop_category_id = shop_category['category_id']
+        subcategories, products = await asyncio.gather(
+            opencart_service.get_subcategories(shop_category_id),
+            opencart_service.get_products_by_category(shop_category_id, limit=_PER_PAGE, offset=0)
+        )
+
+        if subcategories:
+            text = CATALOG_CATEGORIES_TEXT
+            keyboard = categories_keyboard(subcategories, 0)  # parent_id=0 to go back to main menu
+        elif products:
+            text = CATALOG_PRODUCTS_TEXT
+            has_next = len(products) == _PER_PAGE
+            keyboard = products_keyboard(products, shop_category_id, 0, has_next, 0)
+            if has_next:
+                opencart_service.prefetch_products_page(shop_category_id, _PER_PAGE, _PER_PAGE)
         else:
-            # "Магазин" category not found, show all root categories as fallback
-            has_photo = callback.message.photo is not None and len(callback.message.photo) > 0
-
-            text = "📂 <b>Каталог товаров</b>\n\nВыберите категорию:"
-            keyboard = categories_keyboard(categories)
-
-            if has_photo:
-                await callback.message.delete()
-                await callback.message.answer(
-                    text,
-                    reply_markup=keyboard,
-                    parse_mode="HTML"
-                )
-            else:
-                try:
-                    await callback.message.edit_text(
-                        text,
-                        reply_markup=keyboard,
-                        parse_mode="HTML"
-                    )
-                except TelegramBadRequest as e:
-                    if "message is not modified" in str(e):
-                        pass
-                    else:
-                        raise
+            text = CATALOG_NO_PRODUCTS_TEXT
+            keyboard = back_to_main_menu_keyboard()
 
+        await render_response(callback, text, keyboard)
         await callback.answer()
 
-    except Exception as e:
-        logger.error(f"Error showing catalog: {e}")
+    except Exception:
+        logger.exception("Error showing catalog")
         await callback.answer("Произошла ошибка при загрузке каталога", show_alert=True)
 
 
@@ -190,106 +94,38 @@ async def show_catalog(callback: CallbackQuery):
 async def show_category(callback: CallbackQuery):
     """Show category contents (subcategories or products)"""
     try:
-        category_id = int(callback.data.split(":")[1])
-
-        # Get category details
-        category = await opencart_service.get_category_details(category_id)
+        category_id = parse_id(callback.data)
+
+        # Category details, subcategories and the first product page are
+        # independent lookups, so they share one round trip
+        category, subcategories, products = await asyncio.gather(
+            opencart_service.get_category_details(category_id),
+            opencart_service.get_subcategories(category_id),
+            opencart_service.get_products_by_category(category_id, limit=_PER_PAGE, offset=0)
+        )
 
         if not category:
             await callback.answer("Категория не найдена", show_alert=True)
             return
 
-        # Check if current message has photo
-        has_photo = callback.message.photo is not None and len(callback.message.photo) > 0
-
-        # Check for subcategories first
-        subcategories = await opencart_service.get_subcategories(category_id)
-
         if subcategories:
-            # Show subcategories
-            text = f"📁 <b>{category['name']}</b>\n\nВыберите подкатегорию:"
+            text = CATEGORY_SUBCATEGORIES_TEMPLATE.format_map(category)
             keyboard = categories_keyboard(subcategories, category['parent_id'])
-
-            if has_photo:
-                # Delete photo message and send text
-                await callback.message.delete()
-                await callback.message.answer(
-                    text,
-                    reply_markup=keyboard,
-                    parse_mode="HTML"
-                )
-            else:
-                try:
-                    await callback.message.edit_text(
-                        text,
-                        reply_markup=keyboard,
-                        parse_mode="HTML"
-                    )
-                except TelegramBadRequest as e:
-                    if "message is not modified" in str(e):
-                        pass
-                    else:
-                        raise
+        elif products:
+            text = CATEGORY_PRODUCTS_TEMPLATE.format_map(category)
+            has_next = len(products) == _PER_PAGE
+            keyboard = products_keyboard(products, category_id, 0, has_next, category['parent_id'])
+            if has_next:
+                opencart_service.prefetch_products_page(category_id, _PER_PAGE, _PER_PAGE)
         else:
-            # Show products
-            products = await opencart_service.get_products_by_category(
-                category_id,
-                limit=settings.PRODUCTS_PER_PAGE,
-                offset=0
-            )
-
-            if not products:
-                text = f"📁 <b>{category['name']}</b>\n\n😔 В этой категории пока нет товаров."
-                keyboard = categories_keyboard([], category['parent_id'])
-
-                if has_photo:
-                    await callback.message.delete()
-                    await callback.message.answer(
-                        text,
-                        reply_markup=keyboard,
-                        parse_mode="HTML"
-                    )
-                else:
-                    try:
-                        await callback.message.edit_text(
-                            text,
-                            reply_markup=keyboard,
-                            parse_mode="HTML"
-                        )
-                    except TelegramBadRequest as e:
-                        if "message is not modified" in str(e):
-                            pass
-                        else:
-                            raise
-            else:
-                text = f"📁 <b>{category['name']}</b>\n\nВыберите товар:"
-                has_next = len(products) == settings.PRODUCTS_PER_PAGE
-                keyboard = products_keyboard(products, category_id, 0, has_next, category['parent_id'])
-
-                if has_photo:
-                    await callback.message.delete()
-                    await callback.message.answer(
-                        text,
-                        reply_markup=keyboard,
-                        parse_mode="HTML"
-                    )
-                else:
-                    try:
-                        await callback.message.edit_text(
-                            text,
-                            reply_markup=keyboard,
-                            parse_mode="HTML"
-                        )
-                    except TelegramBadRequest as e:
-                        if "message is not modified" in str(e):
-                            pass
-                        else:
-                            raise
+            text = CATEGORY_EMPTY_TEMPLATE.format_map(category)
+            keyboard = categories_keyboard([], category['parent_id'])
 
+        await render_response(callback, text, keyboard)
         await callback.answer()
 
-    except Exception as e:
-        logger.error(f"Error showing category: {e}")
+    except Exception:
+        logger.exception("Error showing category")
         await callback.answer("Произошла ошибка при загрузке категории", show_alert=True)
 
 
@@ -297,9 +133,7 @@ async def show_category(callback: CallbackQuery):
 async def show_category_page(callback: CallbackQuery):
     """Show specific page of products in category"""
     try:
-        parts = callback.data.split(":")
-        category_id = int(parts[1])
-        page = int(parts[2])
+        category_id, page = parse_id_page(callback.data)
 
         # Get category details
         category = await opencart_service.get_category_details(category_id)
@@ -309,10 +143,10 @@ async def show_category_page(callback: CallbackQuery):
             return
 
         # Get products for this page
-        offset = page * settings.PRODUCTS_PER_PAGE
+        offset = page * _PER_PAGE
         products = await opencart_service.get_products_by_category(
             category_id,
-            limit=settings.PRODUCTS_PER_PAGE,
+            limit=_PER_PAGE,
             offset=offset
         )
 
@@ -320,25 +154,21 @@ async def show_category_page(callback: CallbackQuery):
             await callback.answer("Больше товаров нет", show_alert=True)
             return
 
-        text = f"📁 <b>{category['name']}</b>\n\nВыберите товар:"
-        has_next = len(products) == settings.PRODUCTS_PER_PAGE
-
-        try:
-            await callback.message.edit_text(
-                text,
-                reply_markup=products_keyboard(products, category_id, page, has_next, category['parent_id']),
-                parse_mode="HTML"
-            )
-        except TelegramBadRequest as e:
-            if "message is not modified" in str(e):
-                pass
-            else:
-                raise
+        text = CATEGORY_PRODUCTS_TEMPLATE.format_map(category)
+        has_next = len(products) == _PER_PAGE
+
+        keyboard = products_keyboard(products, category_id, page, has_next, category['parent_id'])
+
+        await safe_edit_text(callback.message, text, keyboard)
+
+        # "Next" is the likely following click
+        if has_next:
+            opencart_service.prefetch_products_page(category_id, _PER_PAGE, offset + _PER_PAGE)
 
         await callback.answer()
 
-    except Exception as e:
-        logger.error(f"Error showing category page: {e}")
+    except Exception:
+        logger.exception("Error showing category page")
         await callback.answer("Произошла ошибка при загрузке страницы", show_alert=True)
 
 
@@ -346,7 +176,7 @@ async def show_category_page(callback: CallbackQuery):
 async def show_product(callback: CallbackQuery):
     """Show product details"""
     try:
-        product_id = int(callback.data.split(":")[1])
+        product_id = parse_id(callback.data)
 
         # Get product details
         product = await opencart_service.get_product_details(product_id)
@@ -356,7 +186,7 @@ async def show_product(callback: CallbackQuery):
             return
 
         # Generate product URL for OpenCart
-        product_url = f"{settings.OPENCART_URL}/index.php?route=product/product&product_id={product_id}"
+        product_url = _PRODUCT_URL(product_id)
 
         # Format product card with URL for truncated descriptions
         text = format_product_card(product, product_url=product_url)
@@ -369,72 +199,21 @@ async def show_product(callback: CallbackQuery):
             product_url=product_url
         )
 
-        # Check if current message has photo
-        has_photo = callback.message.photo is not None and len(callback.message.photo) > 0
-
-        # Try to send with image if available
-        if product.get('image'):
-            image_url = f"{settings.OPENCART_URL}/image/{product['image']}"
-
-            try:
-                if has_photo:
-                    # Edit existing photo message
-                    await callback.message.edit_media(
-                        media=InputMediaPhoto(media=image_url, caption=text, parse_mode="HTML"),
-                        reply_markup=keyboard
-                    )
-                else:
-                    # Delete text message and send photo
-                    await callback.message.delete()
-                    await callback.message.answer_photo(
-                        photo=image_url,
-                        caption=text,
-                        reply_markup=keyboard,
-                        parse_mode="HTML"
-                    )
-            except Exception as img_error:
-                logger.warning(f"Failed to send product image: {img_error}")
-                # Fallback to text-only
-                try:
-                    await callback.message.edit_text(
-                        text,
-                        reply_markup=keyboard,
-                        parse_mode="HTML"
-                    )
-                except TelegramBadRequest:
-                    # Can't edit, send new message
-                    await callback.message.delete()
-                    await callback.message.answer(
-                        text,
-                        reply_markup=keyboard,
-                        parse_mode="HTML"
-                    )
-        else:
-            # No image, send text only
-            try:
-                if has_photo:
-                    # Delete photo message and send text
-                    await callback.message.delete()
-                    await callback.message.answer(
-                        text,
-                        reply_markup=keyboard,
-                        parse_mode="HTML"
-                    )
-                else:
-                    # Edit existing text message
-                    await callback.message.edit_text(
-                        text,
-                        reply_markup=keyboard,
-                        parse_mode="HTML"
-                    )
-            except TelegramBadRequest as e:
-                if "message is not modified" in str(e):
-                    pass
-                else:
-                    raise
+        # Show with image if available, by file_id once Telegram has it
+        image_url = _IMAGE_URL(product['image']) if product.get('image') else None
+        file_id = await photo_cache_service.get_file_id(image_url) if image_url else None
+
+        sent = await render_response(callback, text, keyboard, photo=file_id or image_url)
+
+        if image_url:
+            if sent and sent.photo:
+                if not file_id:
+                    await photo_cache_service.remember(image_url, sent.photo[-1].file_id)
+            elif file_id:
+                await photo_cache_service.forget(image_url)
 
         await callback.answer()
 
-    except Exception as e:
-        logger.error(f"Error showing product: {e}")
+    except Exception:
+        logger.exception("Error showing product")
         await callback.answer("Произошла ошибка при загрузке товара", show_alert=True)
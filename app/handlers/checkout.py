@@ -1,13 +1,16 @@
 """
 Checkout and order creation handlers
 """
+import asyncio
+import re
+
 from aiogram import Router, F
 from aiogram.types import CallbackQuery, Message, ReplyKeyboardMarkup, KeyboardButton, ReplyKeyboardRemove
 from aiogram.fsm.context import FSMContext
 from aiogram.exceptions import TelegramBadRequest
-from aiogram.utils.keyboard import InlineKeyboardBuilder
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.database import SessionLocal
 from app.states.checkout import CheckoutStates
 from app.services.cart import cart_service
 from app.services.order import order_service
@@ -18,12 +21,49 @@ from app.keyboards.inline import (
     back_to_main_menu_keyboard
 )
 from app.utils.logger import get_logger
-from app.utils.formatting import format_price
+from app.utils.formatting import format_cart_item, format_price
+from app.utils.render import is_unchanged
 
 logger = get_logger(__name__)
 
 router = Router()
 
+NON_DIGIT_PATTERN = re.compile(r"\D")
+
+# Strong references to fire-and-forget profile updates
+_background_tasks: set[asyncio.Task] = set()
+
+# Reply keyboard for the phone step, markups are frozen so one instance is shared
+CONTACT_KEYBOARD = ReplyKeyboardMarkup(
+    keyboard=[
+        [KeyboardButton(text="📱 Поделиться контактом", request_contact=True)],
+        [KeyboardButton(text="✏️ Ввести номер вручную")]
+    ],
+    resize_keyboard=True,
+    one_time_keyboard=True
+)
+REMOVE_KEYBOARD = ReplyKeyboardRemove()
+
+PHONE_PROMPT_TEMPLATE = """
+📝 <b>Оформление заказа</b>
+
+Сумма к оплате: <b>{total}</b>
+
+📞 <b>Укажите номер телефона</b>
+
+Нажмите "📱 Поделиться контактом" для автоматической отправки вашего номера, или выберите "✏️ Ввести номер вручную".
+"""
+FOREIGN_CONTACT_TEXT = "❌ Пожалуйста, поделитесь своим контактом, а не контактом другого пользователя."
+MANUAL_PHONE_TEXT = "📝 Введите номер телефона в формате:\n+7XXXXXXXXXX или 8XXXXXXXXXX"
+INVALID_PHONE_TEXT = "❌ Неверный формат телефона. Пожалуйста, введите корректный номер."
+PHONE_SAVED_TEXT = "✅ Номер телефона сохранен!"
+NAME_PROMPT_TEXT = "📝 Введите ваше имя:"
+NAME_TOO_SHORT_TEXT = "❌ Имя слишком короткое. Пожалуйста, введите корректное имя."
+ADDRESS_PROMPT_TEXT = "📍 Введите адрес доставки или нажмите кнопку ниже для самовывоза:"
+ADDRESS_TOO_SHORT_TEXT = "❌ Адрес слишком короткий. Пожалуйста, укажите полный адрес."
+ORDER_CANCELLED_TEXT = "❌ <b>Заказ отменен</b>\n\nВы можете продолжить покупки в каталоге."
+CONFIRMATION_FOOTER = "\n\nПроверьте данные и подтвердите заказ для перехода к оплате.\n"
+
 
 @router.callback_query(F.data == "checkout")
 async def start_checkout(callback: CallbackQuery, state: FSMContext, db: AsyncSession):
@@ -31,16 +71,16 @@ async def start_checkout(callback: CallbackQuery, state: FSMContext, db: AsyncSe
     try:
         user_id = callback.from_user.id
 
-        # Get cart
-        cart = await cart_service.get_cart(user_id)
+        # Cart (Redis + OpenCart) and user profile (bot DB) are independent
+        cart, user = await asyncio.gather(
+            cart_service.get_cart(user_id),
+            user_service.get_user(db, user_id)
+        )
 
         if not cart["items"]:
             await callback.answer("🛒 Корзина пуста", show_alert=True)
             return
 
-        # Get user info from database
-        user = await user_service.get_user(db, user_id)
-
         # Auto-fill data from Telegram
         telegram_user = callback.from_user
 
@@ -59,8 +99,9 @@ async def start_checkout(callback: CallbackQuery, state: FSMContext, db: AsyncSe
         elif telegram_user.username:
             email = f"{telegram_user.username}@telegram.user"
 
-        # Store data in state
-        await state.update_data(
+        # Store data in state, with the cart for the confirmation screens
+        data = await state.update_data(
+            cart=cart,
             name=full_name,
             phone=phone,
             email=email,
@@ -72,7 +113,7 @@ async def start_checkout(callback: CallbackQuery, state: FSMContext, db: AsyncSe
         if phone is None:
             await ask_for_phone(callback.message, state, cart['total'])
         else:
-            await show_order_confirmation(callback.message, state, is_callback=True)
+            await show_order_confirmation(callback.message, state, is_callback=True, data=data)
 
         await callback.answer()
 
@@ -81,29 +122,35 @@ async def start_checkout(callback: CallbackQuery, state: FSMContext, db: AsyncSe
         await callback.answer("Произошла ошибка", show_alert=True)
 
 
-async def ask_for_phone(message: Message, state: FSMContext, total: float):
-    """Ask user to share phone contact"""
-    await state.set_state(CheckoutStates.waiting_phone)
+async def _update_phone(user_id: int, phone: str) -> None:
+    """Save phone to user profile in its own session"""
+    async with SessionLocal() as db:
+        await user_service.update_phone(db, user_id, phone)
 
-    # Create keyboard with contact sharing button
-    contact_keyboard = ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text="📱 Поделиться контактом", request_contact=True)],
-            [KeyboardButton(text="✏️ Ввести номер вручную")]
-        ],
-        resize_keyboard=True,
-        one_time_keyboard=True
-    )
 
-    text = f"""
-📝 <b>Оформление заказа</b>
+def _save_phone(user_id: int, phone: str) -> None:
+    """Save phone in the background, the reply does not wait for the database"""
+    task = asyncio.create_task(_update_phone(user_id, phone))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
 
-Сумма к оплате: <b>{format_price(total)}</b>
 
-📞 <b>Укажите номер телефона</b>
+async def _get_cached_cart(state: FSMContext, user_id: int, data: dict | None = None) -> dict:
+    """Cart snapshot taken at checkout start, or a fresh one if it is missing"""
+    if data is None:
+        data = await state.get_data()
+    cart = data.get("cart")
+    if cart is None:
+        cart = await cart_service.get_cart(user_id)
+        await state.update_data(cart=cart)
+    return cart
 
-Нажмите "📱 Поделиться контактом" для автоматической отправки вашего номера, или выберите "✏️ Ввести номер вручную".
-"""
+
+async def ask_for_phone(message: Message, state: FSMContext, total: float):
+    """Ask user to share phone contact"""
+    await state.set_state(CheckoutStates.waiting_phone)
+
+    text = PHONE_PROMPT_TEMPLATE.format(total=format_price(total))
 
     if hasattr(message, 'edit_text'):
         # Callback message - delete and send new
@@ -114,21 +161,21 @@ async def ask_for_phone(message: Message, state: FSMContext, total: float):
 
     await message.answer(
         text,
-        reply_markup=contact_keyboard,
+        reply_markup=CONTACT_KEYBOARD,
         parse_mode="HTML"
     )
 
 
 @router.message(CheckoutStates.waiting_phone, F.contact)
-async def process_contact(message: Message, state: FSMContext, db: AsyncSession):
+async def process_contact(message: Message, state: FSMContext):
     """Process shared contact"""
     contact = message.contact
 
     # Verify it's the user's own contact
     if contact.user_id != message.from_user.id:
         await message.answer(
-            "❌ Пожалуйста, поделитесь своим контактом, а не контактом другого пользователя.",
-            reply_markup=ReplyKeyboardRemove()
+            FOREIGN_CONTACT_TEXT,
+            reply_markup=REMOVE_KEYBOARD
         )
         return
 
@@ -138,19 +185,19 @@ async def process_contact(message: Message, state: FSMContext, db: AsyncSession)
     if not phone.startswith('+'):
         phone = f"+{phone}"
 
-    await state.update_data(phone=phone, needs_phone=False)
+    data = await state.update_data(phone=phone, needs_phone=False)
 
     # Save phone to user profile
-    await user_service.update_phone(db, message.from_user.id, phone)
+    _save_phone(message.from_user.id, phone)
 
     # Remove keyboard
     await message.answer(
-        "✅ Номер телефона сохранен!",
-        reply_markup=ReplyKeyboardRemove()
+        PHONE_SAVED_TEXT,
+        reply_markup=REMOVE_KEYBOARD
     )
 
     # Show confirmation
-    await show_order_confirmation(message, state, is_callback=False)
+    await show_order_confirmation(message, state, is_callback=False, data=data)
 
 
 @router.message(CheckoutStates.waiting_phone, F.text == "✏️ Ввести номер вручную")
@@ -159,22 +206,22 @@ async def ask_manual_phone(message: Message, state: FSMContext):
     await state.set_state(CheckoutStates.waiting_phone_manual)
 
     await message.answer(
-        "📝 Введите номер телефона в формате:\n+7XXXXXXXXXX или 8XXXXXXXXXX",
-        reply_markup=ReplyKeyboardRemove(),
+        MANUAL_PHONE_TEXT,
+        reply_markup=REMOVE_KEYBOARD,
         parse_mode="HTML"
     )
 
 
 @router.message(CheckoutStates.waiting_phone_manual)
-async def process_phone_manual(message: Message, state: FSMContext, db: AsyncSession):
+async def process_phone_manual(message: Message, state: FSMContext):
     """Process manually entered phone"""
     phone = message.text.strip()
 
     # Simple phone validation
-    phone_digits = ''.join(filter(str.isdigit, phone))
+    phone_digits = NON_DIGIT_PATTERN.sub('', phone)
 
     if len(phone_digits) < 10:
-        await message.answer("❌ Неверный формат телефона. Пожалуйста, введите корректный номер.")
+        await message.answer(INVALID_PHONE_TEXT)
         return
 
     # Format phone
@@ -183,42 +230,20 @@ async def process_phone_manual(message: Message, state: FSMContext, db: AsyncSes
     elif not phone.startswith('+'):
         phone = f"+{phone_digits}"
 
-    await state.update_data(phone=phone, needs_phone=False)
+    data = await state.update_data(phone=phone, needs_phone=False)
 
     # Save phone to user profile
-    await user_service.update_phone(db, message.from_user.id, phone)
-
-    await message.answer("✅ Номер телефона сохранен!")
-
-    # Show confirmation
-    await show_order_confirmation(message, state, is_callback=False)
-
+    _save_phone(message.from_user.id, phone)
 
-async def show_order_confirmation(message: Message, state: FSMContext, is_callback: bool = False):
-    """Show order confirmation with pre-filled data"""
-    data = await state.get_data()
-    user_id = message.from_user.id if hasattr(message, 'from_user') else message.chat.id
+    # Show confirmation; the reply keyboard is already gone, so no separate ack
+    await show_order_confirmation(message, state, is_callback=False, data=data, notice=PHONE_SAVED_TEXT)
 
-    # Get cart
-    cart = await cart_service.get_cart(user_id)
 
-    # Build order summary
-    items_text = []
-    for item in cart["items"]:
-        product = item["product"]
-        if isinstance(product, dict):
-            name = product.get("name", "Товар")
-            price = product.get("price", 0)
-        else:
-            name = product.name
-            price = product.price
-
-        items_text.append(
-            f"• {name}\n"
-            f"  {format_price(price)} × {item['quantity']} = {format_price(item['subtotal'])}"
-        )
+def _build_confirmation_text(data: dict, cart: dict, notice: str = "") -> str:
+    """Order confirmation text from checkout data and the cart snapshot"""
+    items_text = "\n".join(format_cart_item(item) for item in cart["items"])
 
-    text = f"""
+    return f"""{notice}
 ✅ <b>Подтверждение заказа</b>
 
 <b>Ваши данные:</b>
@@ -228,60 +253,73 @@ async def show_order_confirmation(message: Message, state: FSMContext, is_callba
 📍 Доставка: {data.get('address', 'Самовывоз')}
 
 <b>Товары:</b>
-{chr(10).join(items_text)}
+{items_text}
 
 ━━━━━━━━━━━━━━━━━
-💰 <b>Итого: {format_price(cart['total'])}</b>
-
-Проверьте данные и подтвердите заказ для перехода к оплате.
-"""
+💰 <b>Итого: {format_price(cart['total'])}</b>""" + CONFIRMATION_FOOTER
+
+
+async def show_order_confirmation(
+    message: Message,
+    state: FSMContext,
+    is_callback: bool = False,
+    data: dict | None = None,
+    notice: str = ""
+):
+    """
+    Show order confirmation with pre-filled data
+
+    Args:
+        message: Message to edit (callback) or answer
+        state: Checkout FSM context
+        is_callback: Edit message in place instead of sending a new one
+        data: FSM data the caller already has, read from storage when None
+        notice: Line shown above the confirmation
+    """
+    if data is None:
+        data = await state.get_data()
+    # The FSM key holds the customer; message.from_user is the bot for callbacks
+    cart = await _get_cached_cart(state, state.key.user_id, data)
+
+    text = _build_confirmation_text(data, cart, notice)
 
     await state.set_state(CheckoutStates.confirm)
 
-    # Create inline keyboard with edit options
-    builder = InlineKeyboardBuilder()
-
-    builder.button(text="✅ Подтвердить и оплатить", callback_data="confirm_order")
-    builder.button(text="✏️ Изменить адрес", callback_data="edit_address")
-    builder.button(text="✏️ Изменить имя", callback_data="edit_name")
-    if data.get('phone'):
-        builder.button(text="📞 Изменить телефон", callback_data="edit_phone")
-    builder.button(text="❌ Отменить", callback_data="cancel_order")
-
-    builder.adjust(1)
+    keyboard = checkout_confirm_keyboard(can_edit_phone=bool(data.get('phone')))
 
     if is_callback:
+        # Editing to identical content only earns "message is not modified"
+        if is_unchanged(message, text, keyboard):
+            return
         try:
             await message.edit_text(
                 text,
-                reply_markup=builder.as_markup(),
+                reply_markup=keyboard,
                 parse_mode="HTML"
             )
         except TelegramBadRequest:
             await message.answer(
                 text,
-                reply_markup=builder.as_markup(),
+                reply_markup=keyboard,
                 parse_mode="HTML"
             )
     else:
         await message.answer(
             text,
-            reply_markup=builder.as_markup(),
+            reply_markup=keyboard,
             parse_mode="HTML"
         )
 
 
 # Edit handlers
-@router.callback_query(F.data == "edit_name", CheckoutStates.confirm)
 async def edit_name(callback: CallbackQuery, state: FSMContext):
     """Edit customer name"""
     await state.set_state(CheckoutStates.waiting_name)
 
-    await callback.message.edit_text(
-        "📝 Введите ваше имя:",
-        parse_mode="HTML"
+    await asyncio.gather(
+        callback.message.edit_text(NAME_PROMPT_TEXT, parse_mode="HTML"),
+        callback.answer()
     )
-    await callback.answer()
 
 
 @router.message(CheckoutStates.waiting_name)
@@ -290,42 +328,45 @@ async def process_name_edit(message: Message, state: FSMContext):
     name = message.text.strip()
 
     if len(name) < 2:
-        await message.answer("❌ Имя слишком короткое. Пожалуйста, введите корректное имя.")
+        await message.answer(NAME_TOO_SHORT_TEXT)
         return
 
-    await state.update_data(name=name)
-    await show_order_confirmation(message, state, is_callback=False)
+    data = await state.update_data(name=name)
+    await show_order_confirmation(message, state, is_callback=False, data=data)
 
 
-@router.callback_query(F.data == "edit_phone", CheckoutStates.confirm)
 async def edit_phone(callback: CallbackQuery, state: FSMContext):
     """Edit phone number"""
-    data = await state.get_data()
-    cart = await cart_service.get_cart(callback.from_user.id)
+    cart = await _get_cached_cart(state, callback.from_user.id)
 
-    await ask_for_phone(callback.message, state, cart['total'])
-    await callback.answer()
+    await asyncio.gather(
+        ask_for_phone(callback.message, state, cart['total']),
+        callback.answer()
+    )
 
 
-@router.callback_query(F.data == "edit_address", CheckoutStates.confirm)
 async def edit_address(callback: CallbackQuery, state: FSMContext):
     """Edit delivery address"""
     await state.set_state(CheckoutStates.waiting_address)
 
-    await callback.message.edit_text(
-        "📍 Введите адрес доставки или нажмите кнопку ниже для самовывоза:",
-        reply_markup=skip_keyboard("skip_address"),
-        parse_mode="HTML"
+    await asyncio.gather(
+        callback.message.edit_text(
+            ADDRESS_PROMPT_TEXT,
+            reply_markup=skip_keyboard("skip_address"),
+            parse_mode="HTML"
+        ),
+        callback.answer()
     )
-    await callback.answer()
 
 
 @router.callback_query(F.data == "skip_address", CheckoutStates.waiting_address)
 async def skip_address(callback: CallbackQuery, state: FSMContext):
     """Skip address (pickup)"""
-    await state.update_data(address="Самовывоз")
-    await show_order_confirmation(callback.message, state, is_callback=True)
-    await callback.answer()
+    data = await state.update_data(address="Самовывоз")
+    await asyncio.gather(
+        show_order_confirmation(callback.message, state, is_callback=True, data=data),
+        callback.answer()
+    )
 
 
 @router.message(CheckoutStates.waiting_address)
@@ -334,24 +375,37 @@ async def process_address_edit(message: Message, state: FSMContext):
     address = message.text.strip()
 
     if len(address) < 5:
-        await message.answer("❌ Адрес слишком короткий. Пожалуйста, укажите полный адрес.")
+        await message.answer(ADDRESS_TOO_SHORT_TEXT)
         return
 
-    await state.update_data(address=address)
-    await show_order_confirmation(message, state, is_callback=False)
+    data = await state.update_data(address=address)
+    await show_order_confirmation(message, state, is_callback=False, data=data)
 
 
-@router.callback_query(F.data == "cancel_order", CheckoutStates.confirm)
 async def cancel_order(callback: CallbackQuery, state: FSMContext):
     """Cancel order creation"""
     await state.clear()
 
-    text = "❌ <b>Заказ отменен</b>\n\nВы можете продолжить покупки в каталоге."
-
-    await callback.message.edit_text(
-        text,
-        reply_markup=back_to_main_menu_keyboard(),
-        parse_mode="HTML"
+    await asyncio.gather(
+        callback.message.edit_text(
+            ORDER_CANCELLED_TEXT,
+            reply_markup=back_to_main_menu_keyboard(),
+            parse_mode="HTML"
+        ),
+        callback.answer("Заказ отменен")
     )
 
-    await callback.answer("Заказ отменен")
+
+# Buttons of the order confirmation screen
+CONFIRM_ACTIONS = {
+    "edit_name": edit_name,
+    "edit_phone": edit_phone,
+    "edit_address": edit_address,
+    "cancel_order": cancel_order
+}
+
+
+@router.callback_query(F.data.in_(CONFIRM_ACTIONS), CheckoutStates.confirm)
+async def confirm_screen_action(callback: CallbackQuery, state: FSMContext):
+    """Dispatch confirmation screen buttons with one set lookup"""
+    await CONFIRM_ACTIONS[callback.data](callback, state)
@@ -0,0 +1,34 @@
+"""
+Shared error handler for exceptions escaping other handlers
+"""
+from aiogram import Router
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import ErrorEvent
+
+from app.keyboards.inline import main_menu_keyboard
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+router = Router()
+
+CALLBACK_ERROR_TEXT = "❌ Произошла ошибка"
+MESSAGE_ERROR_TEXT = "Произошла ошибка. Пожалуйста, попробуйте позже."
+
+
+@router.errors()
+async def handle_error(event: ErrorEvent):
+    """Log the exception and tell the user the action failed"""
+    update = event.update
+    logger.opt(exception=event.exception).error(
+        "Error handling update {}: {}", update.update_id, event.exception
+    )
+
+    try:
+        if update.callback_query:
+            await update.callback_query.answer(CALLBACK_ERROR_TEXT, show_alert=True)
+        elif update.message:
+            await update.message.answer(MESSAGE_ERROR_TEXT, reply_markup=main_menu_keyboard())
+    except TelegramBadRequest as e:
+        # e.g. the callback query was already answered or has expired
+        logger.debug("Could not report error to user: {}", e)
@@ -1,25 +1,59 @@
 """
 Payment processing handlers
 """
+import asyncio
+import re
+
 from aiogram import Router, F
 from aiogram.types import CallbackQuery
 from aiogram.fsm.context import FSMContext
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.database import SessionLocal
 from app.services.cart import cart_service
 from app.services.order import order_service
 from app.services.yoomoney import yoomoney_service
 from app.services.opencart import opencart_service
 from app.services.user import user_service
-from app.keyboards.inline import payment_keyboard, back_to_main_menu_keyboard
+from app.keyboards.inline import payment_keyboard, back_to_main_menu_keyboard, my_orders_keyboard
 from app.utils.logger import get_logger
-from app.utils.formatting import format_price
+from app.utils.formatting import format_date, format_price, get_status_display
 from app.states.checkout import CheckoutStates
+from app.handlers.checkout import show_order_confirmation
 
 logger = get_logger(__name__)
 
 router = Router()
 
+# Payment buttons, callback data is <action>:<order_id>
+CHECK_PAYMENT_PATTERN = re.compile(r"^checkpay:(\d+)$")
+CANCEL_PAYMENT_PATTERN = re.compile(r"^cancelpay:(\d+)$")
+# Order history page, older pages carry the last order shown: my_orders[:<order_id>]
+MY_ORDERS_PATTERN = re.compile(r"^my_orders(?::(\d+))?$")
+MY_ORDERS_PAGE_SIZE = 10
+
+# Strong references to OpenCart sync tasks
+_background_tasks: set[asyncio.Task] = set()
+
+CART_CHANGED_TEXT = "⚠️ Корзина изменилась, проверьте заказ еще раз."
+
+ORDERS_HEADER = "📦 <b>Ваши заказы:</b>\n\n"
+ORDER_LINE_TEMPLATE = """
+{emoji} <b>Заказ #{id}</b>
+💰 Сумма: {amount}
+📅 Дата: {date}
+📊 Статус: {status}
+━━━━━━━━━━━━
+"""
+
+
+def _cart_signature(cart: dict | None) -> tuple | None:
+    """Items, quantities and total that the order amount depends on"""
+    if cart is None:
+        return None
+    items = tuple((item["product_id"], item["quantity"], item["subtotal"]) for item in cart["items"])
+    return items, cart["total"]
+
 
 @router.callback_query(F.data == "confirm_order", CheckoutStates.confirm)
 async def confirm_and_create_order(callback: CallbackQuery, state: FSMContext, db: AsyncSession):
@@ -38,6 +72,17 @@ async def confirm_and_create_order(callback: CallbackQuery, state: FSMContext, d
             await state.clear()
             return
 
+        # The user confirmed the snapshot shown on screen, not the live cart
+        if _cart_signature(cart) != _cart_signature(checkout_data.get("cart")):
+            data = await state.update_data(cart=cart)
+            await asyncio.gather(
+                show_order_confirmation(
+                    callback.message, state, is_callback=True, data=data, notice=CART_CHANGED_TEXT
+                ),
+                callback.answer(CART_CHANGED_TEXT, show_alert=True)
+            )
+            return
+
         # Create order in database
         order = await order_service.create_order(
             db=db,
@@ -86,103 +131,125 @@ async def confirm_and_create_order(callback: CallbackQuery, state: FSMContext, d
         await state.clear()
 
 
-@router.callback_query(F.data.startswith("checkpay:"))
-async def check_payment(callback: CallbackQuery, db: AsyncSession):
-    """Check payment status"""
+async def _create_opencart_order(order_id: int) -> None:
+    """Mirror a paid order into OpenCart, creating the customer if needed"""
     try:
-        order_id = int(callback.data.split(":")[1])
+        async with SessionLocal() as db:
+            order = await order_service.get_order_with_user(db, order_id)
+            if not order:
+                return
+
+            # Get or create OpenCart customer
+            user = order.user
+            customer_id = user.opencart_customer_id
+            # Bot DB writes that can overlap the OpenCart order request
+            pending_writes = []
+            if not customer_id:
+                # Create customer in OpenCart
+                oc_customer_data = {
+                    "firstname": order.customer_name or user.first_name,
+                    "lastname": "Customer",
+                    "email": order.customer_email or f"tg{user.id}@wifiobd.ru",
+                    "telephone": order.customer_phone or ""
+                }
 
-        # Get order
-        order = await order_service.get_order_with_user(db, order_id)
+                oc_customer = await opencart_service.create_customer(oc_customer_data)
+                customer_id = oc_customer.get("customer_id")
+                if customer_id:
+                    pending_writes.append(user_service.update_opencart_id(db, user.id, customer_id))
+
+            # Prepare OpenCart order data
+            oc_products = []
+            for item in order.items:
+                oc_products.append({
+                    "product_id": item.product_id,
+                    "name": item.name,
+                    "model": item.model,
+                    "quantity": item.quantity,
+                    "price": float(item.price)
+                })
+
+            oc_order_data = {
+                "customer_id": customer_id or 0,
+                "firstname": order.customer_name or user.first_name or "Customer",
+                "lastname": "Telegram",
+                "email": order.customer_email or f"tg{user.id}@wifiobd.ru",
+                "telephone": order.customer_phone or "",
+                "payment_method": "YooMoney",
+                "shipping_method": "Самовывоз" if order.delivery_address == "Самовывоз" else "Доставка",
+                "comment": order.delivery_comment or "",
+                "products": oc_products,
+                "payment_address": {
+                    "payment_firstname": order.customer_name or user.first_name or "Customer",
+                    "payment_lastname": "Telegram",
+                    "payment_address_1": order.delivery_address or "",
+                    "payment_city": "Moscow",
+                    "payment_country": "Russia"
+                },
+                "shipping_address": {
+                    "shipping_firstname": order.customer_name or user.first_name or "Customer",
+                    "shipping_lastname": "Telegram",
+                    "shipping_address_1": order.delivery_address or "",
+                    "shipping_city": "Moscow",
+                    "shipping_country": "Russia"
+                },
+                "order_status_id": 2  # Processing
+            }
+
+            # Create order in OpenCart while the customer link is saved
+            oc_order, *_ = await asyncio.gather(
+                opencart_service.create_order(oc_order_data),
+                *pending_writes
+            )
 
-        if not order:
-            await callback.answer("❌ Заказ не найден", show_alert=True)
-            return
+            if oc_order.get("order_id"):
+                await order_service.update_opencart_order_id(db, order.id, oc_order["order_id"])
+                logger.info(f"Created OpenCart order {oc_order['order_id']} for bot order {order.id}")
 
-        # Check if already paid
-        if order.status == "paid":
-            await callback.answer("✅ Заказ уже оплачен", show_alert=True)
-            return
+    except Exception as oc_error:
+        logger.error(f"Failed to create OpenCart order for order {order_id}: {oc_error}")
+        # Order stays paid in the bot
 
-        # Check payment status with YooMoney
-        payment_status = yoomoney_service.check_payment(order.yoomoney_label)
-
-        if payment_status["status"] == "success":
-            # Payment confirmed!
-            await order_service.update_status(db, order.id, "paid")
-
-            # Clear cart
-            await cart_service.clear_cart(order.user_id)
-
-            # Try to create order in OpenCart
-            try:
-                # Get or create OpenCart customer
-                user = order.user
-                if not user.opencart_customer_id:
-                    # Create customer in OpenCart
-                    oc_customer_data = {
-                        "firstname": order.customer_name or user.first_name,
-                        "lastname": "Customer",
-                        "email": order.customer_email or f"tg{user.id}@wifiobd.ru",
-                        "telephone": order.customer_phone or ""
-                    }
-
-                    oc_customer = await opencart_service.create_customer(oc_customer_data)
-                    if oc_customer.get("customer_id"):
-                        await user_service.update_opencart_id(db, user.id, oc_customer["customer_id"])
-                        user.opencart_customer_id = oc_customer["customer_id"]
-
-                # Prepare OpenCart order data
-                oc_products = []
-                for item in order.items:
-                    oc_products.append({
-                        "product_id": item["product_id"],
-                        "name": item["name"],
-                        "model": item["model"],
-                        "quantity": item["quantity"],
-                        "price": item["price"]
-                    })
-
-                oc_order_data = {
-                    "customer_id": user.opencart_customer_id or 0,
-                    "firstname": order.customer_name or user.first_name or "Customer",
-                    "lastname": "Telegram",
-                    "email": order.customer_email or f"tg{user.id}@wifiobd.ru",
-                    "telephone": order.customer_phone or "",
-                    "payment_method": "YooMoney",
-                    "shipping_method": "Самовывоз" if order.delivery_address == "Самовывоз" else "Доставка",
-                    "comment": order.delivery_comment or "",
-                    "products": oc_products,
-                    "payment_address": {
-                        "payment_firstname": order.customer_name or user.first_name or "Customer",
-                        "payment_lastname": "Telegram",
-                        "payment_address_1": order.delivery_address or "",
-                        "payment_city": "Moscow",
-                        "payment_country": "Russia"
-                    },
-                    "shipping_address": {
-                        "shipping_firstname": order.customer_name or user.first_name or "Customer",
-                        "shipping_lastname": "Telegram",
-                        "shipping_address_1": order.delivery_address or "",
-                        "shipping_city": "Moscow",
-                        "shipping_country": "Russia"
-                    },
-                    "order_status_id": 2  # Processing
-                }
 
-                # Create order in OpenCart
-                oc_order = await opencart_service.create_order(oc_order_data)
+def _sync_opencart_order(order_id: int) -> None:
+    """Create the OpenCart order in the background, the reply does not wait for it"""
+    task = asyncio.create_task(_create_opencart_order(order_id))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
 
-                if oc_order.get("order_id"):
-                    await order_service.update_opencart_order_id(db, order.id, oc_order["order_id"])
-                    logger.info(f"Created OpenCart order {oc_order['order_id']} for bot order {order.id}")
 
-            except Exception as oc_error:
-                logger.error(f"Failed to create OpenCart order: {oc_error}")
-                # Continue anyway, order is paid in bot
+@router.callback_query(F.data.regexp(CHECK_PAYMENT_PATTERN).as_("order_match"))
+async def check_payment(callback: CallbackQuery, order_match: re.Match, db: AsyncSession):
+    """Check payment status"""
+    order_id = int(order_match[1])
+
+    # Get order columns only, the OpenCart sync loads user and items itself
+    order = await order_service.get_order(db, order_id)
 
-            # Success message
-            text = f"""
+    if not order:
+        await callback.answer("❌ Заказ не найден", show_alert=True)
+        return
+
+    # Check if already paid
+    if order.status == "paid":
+        await callback.answer("✅ Заказ уже оплачен", show_alert=True)
+        return
+
+    # Check payment status with YooMoney
+    payment_status = yoomoney_service.check_payment(order.yoomoney_label)
+
+    if payment_status["status"] == "success":
+        # Payment confirmed! Only the check that flips the status goes on,
+        # overlapping taps would otherwise sync the order to OpenCart twice
+        if not await order_service.mark_paid(db, order.id):
+            await callback.answer("✅ Заказ уже оплачен", show_alert=True)
+            return
+
+        # OpenCart is not needed for the reply, sync it in the background
+        _sync_opencart_order(order.id)
+
+        # Success message
+        text = f"""
 ✅ <b>Оплата успешна!</b>
 
 Заказ №{order.id} оплачен и принят в обработку.
@@ -195,117 +262,114 @@ async def check_payment(callback: CallbackQuery, db: AsyncSession):
 <b>Спасибо за покупку!</b> 🎉
 """
 
-            await callback.message.edit_text(
+        await asyncio.gather(
+            cart_service.clear_cart(order.user_id),
+            callback.message.edit_text(
                 text,
                 reply_markup=back_to_main_menu_keyboard(),
                 parse_mode="HTML"
-            )
-
-            await callback.answer("✅ Оплата подтверждена!", show_alert=True)
-
-            logger.info(f"Payment confirmed for order {order.id}")
+            ),
+            callback.answer("✅ Оплата подтверждена!", show_alert=True)
+        )
 
-        elif payment_status["status"] == "pending":
-            await callback.answer(
-                "⏳ Оплата еще не поступила.\nПопробуйте через минуту.",
-                show_alert=True
-            )
+        logger.info(f"Payment confirmed for order {order.id}")
 
-        else:
-            await callback.answer(
-                "❌ Не удалось проверить статус оплаты.\nПопробуйте позже.",
-                show_alert=True
-            )
+    elif payment_status["status"] == "pending":
+        await callback.answer(
+            "⏳ Оплата еще не поступила.\nПопробуйте через минуту.",
+            show_alert=True
+        )
 
-    except Exception as e:
-        logger.error(f"Error checking payment: {e}")
-        await callback.answer("❌ Произошла ошибка при проверке оплаты", show_alert=True)
+    else:
+        await callback.answer(
+            "❌ Не удалось проверить статус оплаты.\nПопробуйте позже.",
+            show_alert=True
+        )
 
 
-@router.callback_query(F.data.startswith("cancelpay:"))
-async def cancel_payment(callback: CallbackQuery, db: AsyncSession):
+@router.callback_query(F.data.regexp(CANCEL_PAYMENT_PATTERN).as_("order_match"))
+async def cancel_payment(callback: CallbackQuery, order_match: re.Match, db: AsyncSession):
     """Cancel payment and order"""
-    try:
-        order_id = int(callback.data.split(":")[1])
+    order_id = int(order_match[1])
 
-        # Get order
-        order = await order_service.get_order(db, order_id)
+    # Get order
+    order = await order_service.get_order(db, order_id)
 
-        if not order:
-            await callback.answer("❌ Заказ не найден", show_alert=True)
-            return
+    if not order:
+        await callback.answer("❌ Заказ не найден", show_alert=True)
+        return
 
-        # Check if already paid
-        if order.status == "paid":
-            await callback.answer("❌ Заказ уже оплачен. Для возврата обратитесь в поддержку.", show_alert=True)
-            return
+    # Check if already paid
+    if order.status == "paid":
+        await callback.answer("❌ Заказ уже оплачен. Для возврата обратитесь в поддержку.", show_alert=True)
+        return
 
-        # Cancel order
-        await order_service.update_status(db, order.id, "cancelled")
+    # Cancel order
+    await order_service.update_status(db, order.id, "cancelled")
 
-        text = f"""
+    text = f"""
 ❌ <b>Заказ №{order.id} отменен</b>
 
 Вы можете создать новый заказ в любое время.
 """
 
-        await callback.message.edit_text(
-            text,
-            reply_markup=back_to_main_menu_keyboard(),
-            parse_mode="HTML"
-        )
+    await callback.message.edit_text(
+        text,
+        reply_markup=back_to_main_menu_keyboard(),
+        parse_mode="HTML"
+    )
 
-        await callback.answer("Заказ отменен")
+    await callback.answer("Заказ отменен")
 
-        logger.info(f"Order {order.id} cancelled by user")
+    logger.info(f"Order {order.id} cancelled by user")
 
-    except Exception as e:
-        logger.error(f"Error cancelling payment: {e}")
-        await callback.answer("❌ Произошла ошибка", show_alert=True)
 
+def _format_order_line(order) -> str:
+    """Format one order of the history list"""
+    emoji, status = get_status_display(order.status)
+    return ORDER_LINE_TEMPLATE.format(
+        emoji=emoji,
+        id=order.id,
+        amount=format_price(order.amount),
+        date=format_date(order.created_at),
+        status=status
+    )
 
-@router.callback_query(F.data == "my_orders")
-async def show_my_orders(callback: CallbackQuery, db: AsyncSession):
-    """Show user's order history"""
-    try:
-        user_id = callback.from_user.id
 
-        # Get user's orders
-        orders = await order_service.get_user_orders(db, user_id, limit=10)
-
-        if not orders:
-            text = "📦 <b>История заказов</b>\n\nУ вас пока нет заказов."
-            await callback.message.edit_text(
-                text,
-                reply_markup=back_to_main_menu_keyboard(),
-                parse_mode="HTML"
-            )
-            await callback.answer()
-            return
-
-        # Build orders list
-        text = "📦 <b>Ваши заказы:</b>\n\n"
+@router.callback_query(F.data.regexp(MY_ORDERS_PATTERN).as_("page_match"))
+async def show_my_orders(callback: CallbackQuery, page_match: re.Match, db: AsyncSession):
+    """Show user's order history"""
+    user_id = callback.from_user.id
+    before_id = int(page_match[1]) if page_match[1] else None
 
-        for order in orders:
-            status_emoji = {"pending": "⏳", "paid": "✅", "cancelled": "❌", "completed": "🎉"}.get(order.status, "❓")
-            status_text = {"pending": "Ожидает оплаты", "paid": "Оплачен", "cancelled": "Отменен", "completed": "Выполнен"}.get(order.status, "Неизвестно")
-
-            text += f"""
-{status_emoji} <b>Заказ #{order.id}</b>
-💰 Сумма: {format_price(order.amount)}
-📅 Дата: {order.created_at.strftime('%d.%m.%Y %H:%M')}
-📊 Статус: {status_text}
-━━━━━━━━━━━━
-"""
+    # Get user's orders, one extra row tells whether an older page exists
+    orders = await order_service.get_user_orders(
+        db, user_id, limit=MY_ORDERS_PAGE_SIZE + 1, before_id=before_id
+    )
 
+    if not orders:
+        text = "📦 <b>История заказов</b>\n\nУ вас пока нет заказов."
         await callback.message.edit_text(
             text,
             reply_markup=back_to_main_menu_keyboard(),
             parse_mode="HTML"
         )
-
         await callback.answer()
+        return
 
-    except Exception as e:
-        logger.error(f"Error showing orders: {e}")
-        await callback.answer("❌ Произошла ошибка", show_alert=True)
+    has_older = len(orders) > MY_ORDERS_PAGE_SIZE
+    orders = orders[:MY_ORDERS_PAGE_SIZE]
+
+    # Build orders list
+    text = ORDERS_HEADER + "".join(map(_format_order_line, orders))
+
+    await callback.message.edit_text(
+        text,
+        reply_markup=my_orders_keyboard(
+            next_before_id=orders[-1].id if has_older else None,
+            is_first_page=before_id is None
+        ),
+        parse_mode="HTML"
+    )
+
+    await callback.answer()
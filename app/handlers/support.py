@@ -1,6 +1,8 @@
 """
 Support ticket system handlers
 """
+import re
+
 from aiogram import Router, F
 from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
@@ -9,19 +11,24 @@ from sqlalchemy import select
 from datetime import datetime
 
 from app.states.admin import SupportStates
-from app.database.models import SupportTicket
+from app.database.models import SupportTicket, User
 from app.keyboards.inline import (
     back_to_main_menu_keyboard,
-    admin_ticket_keyboard
+    admin_ticket_keyboard,
+    admin_menu_keyboard
 )
 from app.filters.admin import IsAdmin
 from app.utils.logger import get_logger
+from app.utils.cbdata import parse_id
 from app.utils.formatting import format_date
-from app.bot import bot
+from app.bot import get_bot
 from config import settings
 
 logger = get_logger(__name__)
 
+# Anchored, so ordinary admin messages are rejected on the first character
+TICKET_COMMAND_PATTERN = re.compile(r"^/ticket_(\d+)$")
+
 router = Router()
 
 
@@ -79,7 +86,7 @@ async def support_save_ticket(message: Message, state: FSMContext, db: AsyncSess
 {ticket_text}
 """
 
-                await bot.send_message(
+                await get_bot().send_message(
                     admin_id,
                     admin_text,
                     reply_markup=admin_ticket_keyboard(ticket.id),
@@ -129,27 +136,28 @@ async def admin_show_tickets(callback: CallbackQuery, db: AsyncSession):
             select(SupportTicket)
             .where(SupportTicket.status == "open")
             .order_by(SupportTicket.created_at.desc())
+            .limit(20)  # 20 most recent
         )
         result = await db.execute(query)
         tickets = result.scalars().all()
 
         if not tickets:
-            text = "💬 <b>Обращения в поддержку</b>\n\nНет открытых обращений."
+            parts = ["💬 <b>Обращения в поддержку</b>\n\nНет открытых обращений."]
         else:
-            text = "💬 <b>Открытые обращения:</b>\n\n"
+            parts = ["💬 <b>Открытые обращения:</b>\n\n"]
 
-            for ticket in tickets[:20]:  # Limit to 20 most recent
-                text += f"""
+            for ticket in tickets:
+                parts.append(f"""
 🆘 <b>#{ticket.id}</b> | User ID: {ticket.user_id}
 📅 {format_date(ticket.created_at)}
 📝 {ticket.message[:50]}{'...' if len(ticket.message) > 50 else ''}
 /ticket_{ticket.id}
 
-"""
+""")
 
-        text += "\nНажмите /ticket_ID для просмотра и ответа"
+        parts.append("\nНажмите /ticket_ID для просмотра и ответа")
+        text = "".join(parts)
 
-        from app.keyboards.inline import admin_menu_keyboard
         await callback.message.edit_text(
             text,
             reply_markup=admin_menu_keyboard(),
@@ -163,12 +171,11 @@ async def admin_show_tickets(callback: CallbackQuery, db: AsyncSession):
         await callback.answer("❌ Произошла ошибка", show_alert=True)
 
 
-@admin_router.message(F.text.regexp(r"/ticket_(\d+)"))
-async def admin_show_ticket_details(message: Message, db: AsyncSession):
+@admin_router.message(F.text.regexp(TICKET_COMMAND_PATTERN).as_("ticket_match"))
+async def admin_show_ticket_details(message: Message, db: AsyncSession, ticket_match: re.Match):
     """Show ticket details"""
     try:
-        # Extract ticket ID
-        ticket_id = int(message.text.split("_")[1])
+        ticket_id = int(ticket_match.group(1))
 
         # Get ticket
         query = select(SupportTicket).where(SupportTicket.id == ticket_id)
@@ -180,7 +187,6 @@ async def admin_show_ticket_details(message: Message, db: AsyncSession):
             return
 
         # Get user info
-        from app.database.models import User
         query = select(User).where(User.id == ticket.user_id)
         result = await db.execute(query)
         user = result.scalar_one_or_none()
@@ -218,7 +224,7 @@ async def admin_show_ticket_details(message: Message, db: AsyncSession):
 async def admin_reply_ticket_start(callback: CallbackQuery, state: FSMContext):
     """Start replying to ticket"""
     try:
-        ticket_id = int(callback.data.split(":")[2])
+        ticket_id = parse_id(callback.data)
 
         await state.set_state(SupportStates.waiting_response)
         await state.update_data(ticket_id=ticket_id)
@@ -266,7 +272,7 @@ async def admin_send_ticket_response(message: Message, state: FSMContext, db: As
 
         # Send response to user
         try:
-            await bot.send_message(
+            await get_bot().send_message(
                 ticket.user_id,
                 f"""
 💬 <b>Ответ на ваше обращение #{ticket.id}</b>
@@ -305,7 +311,7 @@ async def admin_send_ticket_response(message: Message, state: FSMContext, db: As
 async def admin_close_ticket(callback: CallbackQuery, db: AsyncSession):
     """Close support ticket"""
     try:
-        ticket_id = int(callback.data.split(":")[2])
+        ticket_id = parse_id(callback.data)
 
         # Get ticket
         query = select(SupportTicket).where(SupportTicket.id == ticket_id)
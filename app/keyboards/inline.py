@@ -1,11 +1,17 @@
 """
 Inline keyboard builders
+
+Static keyboards are built once and shared: aiogram markups are frozen.
+Catalog keyboards are memoized on the rows they display, so a page shown
+to many users is built once and a changed name or price is a new entry.
 """
-from typing import List, Dict, Any
+from functools import lru_cache
+from typing import List, Dict, Any, Tuple
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 
+@lru_cache
 def main_menu_keyboard() -> InlineKeyboardMarkup:
     """Main menu keyboard"""
     builder = InlineKeyboardBuilder()
@@ -19,6 +25,11 @@ def main_menu_keyboard() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+# Distinct catalog screens kept in memory
+CATALOG_KEYBOARD_CACHE_SIZE = 2048
+
+
+@lru_cache
 def back_to_main_menu_keyboard() -> InlineKeyboardMarkup:
     """Simple back to main menu button"""
     builder = InlineKeyboardBuilder()
@@ -34,12 +45,19 @@ def categories_keyboard(categories: List[Dict[str, Any]], parent_id: int = 0) ->
         categories: List of category dicts
         parent_id: Parent category ID (for back button)
     """
+    rows = tuple((category['category_id'], category['name']) for category in categories)
+    return _categories_markup(rows, parent_id)
+
+
+@lru_cache(maxsize=CATALOG_KEYBOARD_CACHE_SIZE)
+def _categories_markup(rows: Tuple[Tuple[int, str], ...], parent_id: int) -> InlineKeyboardMarkup:
+    """Build categories keyboard from (category_id, name) rows"""
     builder = InlineKeyboardBuilder()
 
-    for category in categories:
+    for category_id, name in rows:
         builder.button(
-            text=f"📁 {category['name']}",
-            callback_data=f"cat:{category['category_id']}"
+            text=f"📁 {name}",
+            callback_data=f"cat:{category_id}"
         )
 
     builder.adjust(2)
@@ -76,13 +94,26 @@ def products_keyboard(
         has_next: Whether there's a next page
         parent_id: Parent category ID for back button
     """
+    rows = tuple((product['product_id'], product['name'], product['price']) for product in products)
+    return _products_markup(rows, category_id, page, has_next, parent_id)
+
+
+@lru_cache(maxsize=CATALOG_KEYBOARD_CACHE_SIZE)
+def _products_markup(
+    rows: Tuple[Tuple[int, str, float], ...],
+    category_id: int,
+    page: int,
+    has_next: bool,
+    parent_id: int
+) -> InlineKeyboardMarkup:
+    """Build products keyboard from (product_id, name, price) rows"""
     builder = InlineKeyboardBuilder()
 
-    for product in products:
-        price_text = f"{product['price']:.2f}₽"
+    for product_id, name, price in rows:
+        price_text = f"{price:.2f}₽"
         builder.button(
-            text=f"{product['name']} - {price_text}",
-            callback_data=f"prod:{product['product_id']}"
+            text=f"{name} - {price_text}",
+            callback_data=f"prod:{product_id}"
         )
 
     builder.adjust(1)
@@ -124,6 +155,7 @@ def products_keyboard(
     return builder.as_markup()
 
 
+@lru_cache(maxsize=CATALOG_KEYBOARD_CACHE_SIZE)
 def product_card_keyboard(product_id: int, category_id: int, in_stock: bool = True, product_url: str = None) -> InlineKeyboardMarkup:
     """Keyboard for product card"""
     builder = InlineKeyboardBuilder()
@@ -150,6 +182,7 @@ def product_card_keyboard(product_id: int, category_id: int, in_stock: bool = Tr
     return builder.as_markup()
 
 
+@lru_cache
 def cart_keyboard(has_items: bool = False) -> InlineKeyboardMarkup:
     """Keyboard for cart view"""
     builder = InlineKeyboardBuilder()
@@ -180,12 +213,16 @@ def cart_item_keyboard(product_id: int, quantity: int) -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
-def checkout_confirm_keyboard() -> InlineKeyboardMarkup:
-    """Keyboard for order confirmation"""
+@lru_cache
+def checkout_confirm_keyboard(can_edit_phone: bool = False) -> InlineKeyboardMarkup:
+    """Keyboard for order confirmation with edit options"""
     builder = InlineKeyboardBuilder()
 
     builder.button(text="✅ Подтвердить и оплатить", callback_data="confirm_order")
-    builder.button(text="✏️ Изменить данные", callback_data="edit_order")
+    builder.button(text="✏️ Изменить адрес", callback_data="edit_address")
+    builder.button(text="✏️ Изменить имя", callback_data="edit_name")
+    if can_edit_phone:
+        builder.button(text="📞 Изменить телефон", callback_data="edit_phone")
     builder.button(text="❌ Отменить", callback_data="cancel_order")
 
     builder.adjust(1)
@@ -213,6 +250,32 @@ def payment_keyboard(order_id: int, payment_url: str) -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+def my_orders_keyboard(next_before_id: int | None = None, is_first_page: bool = True) -> InlineKeyboardMarkup:
+    """
+    Keyboard for order history pages
+
+    Args:
+        next_before_id: Last order shown, set when there are older orders
+        is_first_page: Whether the newest orders are shown
+    """
+    builder = InlineKeyboardBuilder()
+
+    pagination_buttons = []
+    if not is_first_page:
+        pagination_buttons.append(InlineKeyboardButton(text="⏮ Сначала", callback_data="my_orders"))
+    if next_before_id is not None:
+        pagination_buttons.append(InlineKeyboardButton(
+            text="Старше ▶️",
+            callback_data=f"my_orders:{next_before_id}"
+        ))
+    if pagination_buttons:
+        builder.row(*pagination_buttons)
+
+    builder.row(InlineKeyboardButton(text="🏠 Главное меню", callback_data="start"))
+    return builder.as_markup()
+
+
+@lru_cache
 def skip_keyboard(callback_data: str = "skip") -> InlineKeyboardMarkup:
     """Skip button keyboard"""
     builder = InlineKeyboardBuilder()
@@ -220,6 +283,7 @@ def skip_keyboard(callback_data: str = "skip") -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@lru_cache
 def admin_menu_keyboard() -> InlineKeyboardMarkup:
     """Admin panel main menu"""
     builder = InlineKeyboardBuilder()
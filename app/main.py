@@ -8,11 +8,12 @@ from contextlib import asynccontextmanager
 from aiogram import Bot, Dispatcher
 from aiogram.fsm.storage.memory import MemoryStorage
 
-from app.bot import bot, dp
+from app.bot import get_bot, get_dp
 from app.database import init_db
 from app.services.cart import cart_service
+from app.services.opencart import opencart_service
 from app.middlewares import ThrottlingMiddleware, DatabaseMiddleware
-from app.handlers import routers
+from app.handlers import register_routers
 from app.utils.logger import get_logger
 from config import settings
 
@@ -53,14 +54,20 @@ async def on_shutdown():
     except Exception as e:
         logger.error(f"Error closing Redis: {e}")
 
+    # Close OpenCart API session
+    await opencart_service.close_session()
+
     # Close bot session
-    await bot.session.close()
+    await get_bot().session.close()
 
     logger.info("Bot shutdown completed")
 
 
 async def main():
     """Main function to run the bot"""
+    bot = get_bot()
+    dp = get_dp()
+
     try:
         # Register middlewares
         dp.message.middleware(DatabaseMiddleware())
@@ -71,10 +78,9 @@ async def main():
         logger.info("Middlewares registered")
 
         # Register routers
-        for router in routers:
-            dp.include_router(router)
+        routers_count = register_routers(dp)
 
-        logger.info(f"Registered {len(routers)} routers")
+        logger.info(f"Registered {routers_count} routers")
 
         # Run startup actions
         await on_startup()
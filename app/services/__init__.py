@@ -4,11 +4,13 @@ from .cart import cart_service
 from .yoomoney import yoomoney_service
 from .user import user_service
 from .order import order_service
+from .photo import photo_cache_service
 
 __all__ = [
     "opencart_service",
     "cart_service",
     "yoomoney_service",
     "user_service",
-    "order_service"
+    "order_service",
+    "photo_cache_service"
 ]
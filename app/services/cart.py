@@ -7,15 +7,37 @@ import redis.asyncio as redis
 from config import settings
 from app.services.opencart import opencart_service
 from app.utils.logger import get_logger
+from app.utils.formatting import format_cart_summary
 
 logger = get_logger(__name__)
 
+# Atomic read-modify-write of one cart entry in a single round-trip.
+# KEYS[1] cart key, ARGV: product_id, delta, expire seconds.
+# Returns new quantity, 0 if the item was removed, -1 if it is not in the cart
+CHANGE_QUANTITY_LUA = """
+local raw = redis.call('HGET', KEYS[1], ARGV[1])
+if not raw then
+    return -1
+end
+local item = cjson.decode(raw)
+local quantity = item['quantity'] + tonumber(ARGV[2])
+if quantity <= 0 then
+    redis.call('HDEL', KEYS[1], ARGV[1])
+    return 0
+end
+item['quantity'] = quantity
+redis.call('HSET', KEYS[1], ARGV[1], cjson.encode(item))
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return quantity
+"""
+
 
 class CartService:
     """Service for managing shopping carts in Redis"""
 
     def __init__(self):
         self.redis_client: Optional[redis.Redis] = None
+        self._change_quantity_script = None
         self.expire_seconds = settings.CART_EXPIRE_DAYS * 24 * 3600
 
     async def init_redis(self):
@@ -27,6 +49,7 @@ class CartService:
                 encoding="utf-8",
                 decode_responses=True
             )
+            self._change_quantity_script = self.redis_client.register_script(CHANGE_QUANTITY_LUA)
             logger.info("Redis connection initialized")
 
     async def close_redis(self):
@@ -130,6 +153,34 @@ class CartService:
             logger.error(f"Failed to update item quantity: {e}")
             return False
 
+    async def change_quantity(
+        self,
+        user_id: int,
+        product_id: int,
+        delta: int
+    ) -> Optional[int]:
+        """
+        Change item quantity by delta, removing the item when it drops to zero
+
+        Returns:
+            New quantity (0 if the item was removed), None if item is not in cart
+        """
+        try:
+            quantity = await self._change_quantity_script(
+                keys=[self._cart_key(user_id)],
+                args=[product_id, delta, self.expire_seconds]
+            )
+
+            if quantity < 0:
+                return None
+
+            logger.info(f"Changed product {product_id} quantity to {quantity} for user {user_id}")
+            return quantity
+
+        except Exception as e:
+            logger.error(f"Failed to change item quantity: {e}")
+            return None
+
     async def get_cart(self, user_id: int) -> Dict[str, Any]:
         """
         Get user's cart with full product details
@@ -214,7 +265,6 @@ class CartService:
         if not cart["items"]:
             return "🛒 Ваша корзина пуста"
 
-        from app.utils.formatting import format_cart_summary
         return format_cart_summary(cart)
 
 
@@ -2,8 +2,11 @@
 OpenCart integration service
 Hybrid approach: Read from DB, Write via API
 """
-from typing import List, Dict, Any, Optional
+import asyncio
+import json
+from typing import Iterable, List, Dict, Any, Optional
 import aiohttp
+from cachetools import TTLCache
 from sqlalchemy import select, and_, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -12,12 +15,22 @@ from app.database.opencart_models import (
     OCProduct, OCProductDescription, OCProductToCategory,
     OCCustomer, OCOrder, OCOrderProduct
 )
+from app.database.utils import in_batches
 from config.opencart_db import OpenCartSessionLocal
 from config import settings
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Seconds a product's stock/price snapshot is reused by add-to-cart
+PRODUCT_AVAILABILITY_TTL = 30
+# Seconds the category tree is reused; it changes only from the OpenCart admin
+CATALOG_CACHE_TTL = 300
+# Seconds a product card or product page is reused while users page back and forth
+PRODUCT_DETAILS_TTL = 120
+# Next-page prefetches allowed to hit the database at once
+PREFETCH_CONCURRENCY = 32
+
 
 class OpenCartService:
     """Service for OpenCart integration"""
@@ -30,6 +43,13 @@ class OpenCartService:
         self.store_id = 0  # Default store
         self._api_token = None  # Session token from API login
         self._session = None  # Persistent aiohttp session
+        self._availability_cache = TTLCache(maxsize=2048, ttl=PRODUCT_AVAILABILITY_TTL)
+        self._availability_locks: Dict[int, asyncio.Lock] = {}
+        self._catalog_cache = TTLCache(maxsize=1024, ttl=CATALOG_CACHE_TTL)
+        self._product_cache = TTLCache(maxsize=4096, ttl=PRODUCT_DETAILS_TTL)
+        self._product_page_cache = TTLCache(maxsize=1024, ttl=PRODUCT_DETAILS_TTL)
+        self._prefetch_semaphore = asyncio.Semaphore(PREFETCH_CONCURRENCY)
+        self._prefetch_tasks: set[asyncio.Task] = set()
 
     async def _get_db_session(self) -> AsyncSession:
         """Get OpenCart database session"""
@@ -37,8 +57,29 @@ class OpenCartService:
 
     # ==================== CATALOG OPERATIONS (READ FROM DB) ====================
 
+    def invalidate_catalog_cache(self) -> None:
+        """Drop cached categories and product pages so the next request reads the database"""
+        self._catalog_cache.clear()
+        self._product_page_cache.clear()
+
+    async def get_root_category_by_name(self, name: str) -> Optional[Dict[str, Any]]:
+        """Get root category by case-insensitive name"""
+        by_name = self._catalog_cache.get("root_by_name")
+        if by_name is None:
+            categories = await self.get_root_categories()
+            # First match wins, as with a scan in sort order
+            by_name = {}
+            for category in categories:
+                by_name.setdefault(category["name"].lower(), category)
+            self._catalog_cache["root_by_name"] = by_name
+        return by_name.get(name.lower())
+
     async def get_root_categories(self) -> List[Dict[str, Any]]:
-        """Get root level categories (parent_id = 0)"""
+        """Get root level categories (parent_id = 0), cached for CATALOG_CACHE_TTL"""
+        categories = self._catalog_cache.get("root")
+        if categories is not None:
+            return categories
+
         async with OpenCartSessionLocal() as session:
             query = (
                 select(OCCategory, OCCategoryDescription)
@@ -65,10 +106,16 @@ class OpenCartService:
                     "sort_order": category.sort_order
                 })
 
+            self._catalog_cache["root"] = categories
             return categories
 
     async def get_subcategories(self, parent_id: int) -> List[Dict[str, Any]]:
-        """Get subcategories of a specific category"""
+        """Get subcategories of a specific category, cached for CATALOG_CACHE_TTL"""
+        key = ("sub", parent_id)
+        categories = self._catalog_cache.get(key)
+        if categories is not None:
+            return categories
+
         async with OpenCartSessionLocal() as session:
             query = (
                 select(OCCategory, OCCategoryDescription)
@@ -95,10 +142,15 @@ class OpenCartService:
                     "sort_order": category.sort_order
                 })
 
+            self._catalog_cache[key] = categories
             return categories
 
     async def get_category_details(self, category_id: int) -> Optional[Dict[str, Any]]:
-        """Get category details by ID"""
+        """Get category details by ID, cached for CATALOG_CACHE_TTL"""
+        key = ("details", category_id)
+        if key in self._catalog_cache:
+            return self._catalog_cache[key]
+
         async with OpenCartSessionLocal() as session:
             query = (
                 select(OCCategory, OCCategoryDescription)
@@ -115,18 +167,20 @@ class OpenCartService:
             row = result.first()
 
             if not row:
-                return None
-
-            category, description = row
+                category_details = None
+            else:
+                category, description = row
+                category_details = {
+                    "category_id": category.category_id,
+                    "name": description.name,
+                    "description": description.description,
+                    "image": category.image,
+                    "parent_id": category.parent_id,
+                    "sort_order": category.sort_order
+                }
 
-            return {
-                "category_id": category.category_id,
-                "name": description.name,
-                "description": description.description,
-                "image": category.image,
-                "parent_id": category.parent_id,
-                "sort_order": category.sort_order
-            }
+            self._catalog_cache[key] = category_details
+            return category_details
 
     async def get_products_by_category(
         self,
@@ -134,7 +188,12 @@ class OpenCartService:
         limit: int = 10,
         offset: int = 0
     ) -> List[Dict[str, Any]]:
-        """Get products in a category with pagination"""
+        """Get products in a category with pagination, cached for PRODUCT_DETAILS_TTL"""
+        key = (category_id, limit, offset)
+        products = self._product_page_cache.get(key)
+        if products is not None:
+            return products
+
         async with OpenCartSessionLocal() as session:
             query = (
                 select(OCProduct, OCProductDescription)
@@ -167,10 +226,36 @@ class OpenCartService:
                     "category_id": category_id
                 })
 
+            self._product_page_cache[key] = products
             return products
 
+    def prefetch_products_page(self, category_id: int, limit: int, offset: int) -> None:
+        """Warm the page cache for a page the user is likely to open next"""
+        if (category_id, limit, offset) in self._product_page_cache:
+            return
+        task = asyncio.create_task(self._prefetch_products_page(category_id, limit, offset))
+        self._prefetch_tasks.add(task)
+        task.add_done_callback(self._prefetch_tasks.discard)
+
+    async def _prefetch_products_page(self, category_id: int, limit: int, offset: int) -> None:
+        """Load a product page into the cache, bounded by PREFETCH_CONCURRENCY"""
+        try:
+            async with self._prefetch_semaphore:
+                await self.get_products_by_category(category_id, limit=limit, offset=offset)
+        except Exception as e:
+            logger.warning(f"Failed to prefetch products of category {category_id}: {e}")
+
     async def get_product_details(self, product_id: int) -> Optional[Dict[str, Any]]:
-        """Get detailed product information"""
+        """Get detailed product information, cached for PRODUCT_DETAILS_TTL"""
+        if product_id in self._product_cache:
+            return self._product_cache[product_id]
+
+        product = await self._fetch_product_details(product_id)
+        self._product_cache[product_id] = product
+        return product
+
+    async def _fetch_product_details(self, product_id: int) -> Optional[Dict[str, Any]]:
+        """Read product information from the database"""
         async with OpenCartSessionLocal() as session:
             query = (
                 select(OCProduct, OCProductDescription)
@@ -212,33 +297,66 @@ class OpenCartService:
                 "in_stock": product.quantity > 0
             }
 
+    async def get_product_availability(self, product_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Get short-lived cached product availability for add-to-cart checks
+
+        Returns:
+            Dict with name, price, in_stock, or None if product not found
+        """
+        if product_id in self._availability_cache:
+            return self._availability_cache[product_id]
+
+        # Concurrent clicks on the same product share one lookup
+        lock = self._availability_locks.setdefault(product_id, asyncio.Lock())
+        try:
+            async with lock:
+                if product_id in self._availability_cache:
+                    return self._availability_cache[product_id]
+
+                # Stock checks read the database, not the product card cache
+                product = await self._fetch_product_details(product_id)
+                self._product_cache[product_id] = product
+                availability = {
+                    "name": product["name"],
+                    "price": product["price"],
+                    "in_stock": product["in_stock"]
+                } if product else None
+
+                self._availability_cache[product_id] = availability
+                return availability
+        finally:
+            if not lock.locked():
+                self._availability_locks.pop(product_id, None)
+
+    def invalidate_product_availability(self, product_ids: Iterable[int]) -> None:
+        """Drop cached availability and product cards after stock may have changed"""
+        for product_id in product_ids:
+            self._availability_cache.pop(product_id, None)
+            self._product_cache.pop(product_id, None)
+
     async def get_products_batch(self, product_ids: List[int]) -> Dict[int, Dict[str, Any]]:
-        """Get multiple products by IDs in one query"""
+        """Get multiple products by IDs (one query per IN_BATCH_SIZE ids)"""
         async with OpenCartSessionLocal() as session:
             query = (
                 select(OCProduct, OCProductDescription)
                 .join(OCProductDescription, OCProduct.product_id == OCProductDescription.product_id)
-                .where(
-                    and_(
-                        OCProduct.product_id.in_(product_ids),
-                        OCProductDescription.language_id == self.language_id
-                    )
-                )
+                .where(OCProductDescription.language_id == self.language_id)
             )
 
-            result = await session.execute(query)
             products = {}
 
-            for product, description in result:
-                products[product.product_id] = {
-                    "product_id": product.product_id,
-                    "name": description.name,
-                    "description": description.description,
-                    "model": product.model,
-                    "price": float(product.price),
-                    "quantity": product.quantity,
-                    "image": product.image
-                }
+            async for result in in_batches(session, query, OCProduct.product_id, product_ids):
+                for product, description in result:
+                    products[product.product_id] = {
+                        "product_id": product.product_id,
+                        "name": description.name,
+                        "description": description.description,
+                        "model": product.model,
+                        "price": float(product.price),
+                        "quantity": product.quantity,
+                        "image": product.image
+                    }
 
             return products
 
@@ -281,7 +399,15 @@ class OpenCartService:
     async def _get_session(self):
         """Get or create aiohttp session"""
         if self._session is None or self._session.closed:
-            self._session = aiohttp.ClientSession()
+            # Keep-alive pool, so API calls skip the TCP/TLS handshake
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=settings.OPENCART_HTTP_POOL_LIMIT,
+                    ttl_dns_cache=300,
+                    keepalive_timeout=60
+                ),
+                timeout=aiohttp.ClientTimeout(total=settings.OPENCART_HTTP_TIMEOUT)
+            )
         return self._session
 
     async def close_session(self):
@@ -365,7 +491,6 @@ class OpenCartService:
                     for key, value in data.items():
                         if isinstance(value, (list, dict)):
                             # For complex data, need to handle properly
-                            import json
                             form_data.add_field(key, json.dumps(value))
                         else:
                             form_data.add_field(key, str(value))
@@ -502,6 +627,11 @@ class OpenCartService:
             # Step 8: Confirm and create the order
             confirm_response = await self._api_request("api/order/add")
 
+            # Ordered products' stock is changed by OpenCart
+            self.invalidate_product_availability(
+                product["product_id"] for product in order_data.get("products", [])
+            )
+
             logger.info(f"OpenCart order created: {confirm_response}")
 
             # Extract order_id from response
@@ -3,19 +3,28 @@ Order management service
 """
 from typing import List, Dict, Any, Optional
 from datetime import datetime
-from sqlalchemy import select, update
+from sqlalchemy import lambda_stmt, select, tuple_, update, func
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload, raiseload
+from cachetools import TTLCache
 
-from app.database.models import Order, User
+from app.database.models import Order, OrderItem, User
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Seconds the admin dashboard aggregates may lag behind the database
+STATS_CACHE_TTL = 30
+# Best-selling products included in the dashboard aggregates
+STATS_TOP_PRODUCTS = 5
+
 
 class OrderService:
     """Service for managing orders"""
 
+    def __init__(self):
+        self._stats_cache = TTLCache(maxsize=1, ttl=STATS_CACHE_TTL)
+
     async def create_order(
         self,
         db: AsyncSession,
@@ -40,13 +49,13 @@ class OrderService:
             items = []
             for cart_item in cart["items"]:
                 product = cart_item["product"]
-                items.append({
-                    "product_id": product["product_id"],
-                    "name": product["name"],
-                    "model": product["model"],
-                    "price": product["price"],
-                    "quantity": cart_item["quantity"]
-                })
+                items.append(OrderItem(
+                    product_id=product["product_id"],
+                    name=product["name"],
+                    model=product["model"],
+                    price=product["price"],
+                    quantity=cart_item["quantity"]
+                ))
 
             # Create order
             order = Order(
@@ -64,6 +73,7 @@ class OrderService:
             db.add(order)
             await db.commit()
             await db.refresh(order)
+            self.invalidate_stats()
 
             logger.info(f"Created order {order.id} for user {user_id}, amount: {order.amount}")
             return order
@@ -78,9 +88,15 @@ class OrderService:
         db: AsyncSession,
         order_id: int
     ) -> Optional[Order]:
-        """Get order by ID"""
+        """Get order by ID, without its user and items (use get_order_with_user for those)"""
         try:
-            query = select(Order).where(Order.id == order_id)
+            # Cached lambda statement: only order_id is re-bound per call.
+            # Relationships are not loaded, so there's no users join either
+            query = lambda_stmt(
+                lambda: select(Order)
+                .options(raiseload(Order.user), raiseload(Order.items))
+                .where(Order.id == order_id)
+            )
             result = await db.execute(query)
             return result.scalar_one_or_none()
         except Exception as e:
@@ -92,15 +108,17 @@ class OrderService:
         db: AsyncSession,
         order_id: int
     ) -> Optional[Order]:
-        """Get order with user details"""
+        """Get order with user details and line items"""
         try:
+            # Single round-trip: user and items joined instead of a selectin query
             query = (
                 select(Order)
-                .options(selectinload(Order.user))
+                .options(joinedload(Order.user), joinedload(Order.items))
                 .where(Order.id == order_id)
             )
             result = await db.execute(query)
-            return result.scalar_one_or_none()
+            # Joined collection repeats the order row per item
+            return result.unique().scalar_one_or_none()
         except Exception as e:
             logger.error(f"Failed to get order with user: {e}")
             return None
@@ -110,29 +128,82 @@ class OrderService:
         db: AsyncSession,
         order_id: int,
         status: str
-    ) -> bool:
-        """Update order status"""
+    ) -> Optional[Order]:
+        """
+        Update order status
+
+        Runs two statements in one transaction: the UPDATE and a single
+        joined re-read of the order with its user and items, then one COMMIT.
+
+        Returns:
+            Updated Order object (with user and items loaded), None if not found or failed
+        """
         try:
-            updates = {
-                "status": status,
-                "updated_at": datetime.utcnow()
-            }
+            updates = {"status": status}
 
             # Set paid_at timestamp when order is paid
             if status == "paid":
                 updates["paid_at"] = datetime.utcnow()
 
-            query = update(Order).where(Order.id == order_id).values(**updates)
-            await db.execute(query)
+            query = (
+                update(Order)
+                .where(Order.id == order_id)
+                .values(**updates)
+                .returning(Order.id)
+            )
+            updated_id = await db.scalar(query)
+
+            order = None
+            if updated_id is not None:
+                # Order cards render user and items, join both into one read
+                query = (
+                    select(Order)
+                    .options(joinedload(Order.user), joinedload(Order.items))
+                    .where(Order.id == order_id)
+                    .execution_options(populate_existing=True)
+                )
+                result = await db.execute(query)
+                order = result.unique().scalar_one()
+
             await db.commit()
+            self.invalidate_stats()
 
             logger.info(f"Updated order {order_id} status to {status}")
-            return True
+            return order
 
         except Exception as e:
             logger.error(f"Failed to update order status: {e}")
             await db.rollback()
-            return False
+            return None
+
+    async def mark_paid(self, db: AsyncSession, order_id: int) -> bool:
+        """
+        Move order to "paid" unless it already is
+
+        The status check is part of the UPDATE, so of concurrent payment
+        checks only one sees True and runs the post-payment work.
+
+        Returns:
+            True if this call marked the order paid
+        """
+        try:
+            query = (
+                update(Order)
+                .where(Order.id == order_id, Order.status != "paid")
+                .values(status="paid", paid_at=datetime.utcnow())
+                .returning(Order.id)
+            )
+            marked = await db.scalar(query) is not None
+            await db.commit()
+        except Exception as e:
+            logger.error(f"Failed to mark order {order_id} paid: {e}")
+            await db.rollback()
+            raise
+
+        if marked:
+            self.invalidate_stats()
+            logger.info(f"Updated order {order_id} status to paid")
+        return marked
 
     async def update_payment_label(
         self,
@@ -145,7 +216,7 @@ class OrderService:
             query = (
                 update(Order)
                 .where(Order.id == order_id)
-                .values(yoomoney_label=label, updated_at=datetime.utcnow())
+                .values(yoomoney_label=label)
             )
             await db.execute(query)
             await db.commit()
@@ -169,7 +240,7 @@ class OrderService:
             query = (
                 update(Order)
                 .where(Order.id == order_id)
-                .values(opencart_order_id=opencart_order_id, updated_at=datetime.utcnow())
+                .values(opencart_order_id=opencart_order_id)
             )
             await db.execute(query)
             await db.commit()
@@ -186,16 +257,32 @@ class OrderService:
         self,
         db: AsyncSession,
         user_id: int,
-        limit: int = 10
+        limit: int = 10,
+        before_id: Optional[int] = None
     ) -> List[Order]:
-        """Get user's orders"""
+        """
+        Get user's orders, newest first
+
+        Args:
+            db: Database session
+            user_id: User's Telegram ID
+            limit: Page size
+            before_id: Last order of the previous page, first page when None
+        """
         try:
+            # History shows order header fields only, skip the users join
             query = (
                 select(Order)
+                .options(raiseload(Order.user))
                 .where(Order.user_id == user_id)
-                .order_by(Order.created_at.desc())
+                .order_by(Order.created_at.desc(), Order.id.desc())
                 .limit(limit)
             )
+            if before_id is not None:
+                # Keyset pagination: seek past the previous page's last row
+                # through the index instead of scanning skipped rows
+                cursor = select(Order.created_at, Order.id).where(Order.id == before_id)
+                query = query.where(tuple_(Order.created_at, Order.id) < cursor.scalar_subquery())
             result = await db.execute(query)
             return result.scalars().all()
         except Exception as e:
@@ -209,9 +296,10 @@ class OrderService:
     ) -> List[Order]:
         """Get recent orders (for admin)"""
         try:
+            # One query: users joined in, line items are not needed for the list
             query = (
                 select(Order)
-                .options(selectinload(Order.user))
+                .options(joinedload(Order.user), raiseload(Order.items))
                 .order_by(Order.created_at.desc())
                 .limit(limit)
             )
@@ -226,6 +314,7 @@ class OrderService:
         try:
             query = (
                 select(Order)
+                .options(raiseload(Order.user))
                 .where(Order.status == "pending")
                 .order_by(Order.created_at.desc())
             )
@@ -235,6 +324,70 @@ class OrderService:
             logger.error(f"Failed to get pending orders: {e}")
             return []
 
+    async def get_top_products(
+        self,
+        db: AsyncSession,
+        limit: int = 10
+    ) -> List[Dict[str, Any]]:
+        """Get best-selling products aggregated over paid and completed orders"""
+        try:
+            quantity = func.sum(OrderItem.quantity).label("quantity")
+            query = (
+                select(
+                    OrderItem.product_id,
+                    func.max(OrderItem.name).label("name"),
+                    quantity,
+                    func.sum(OrderItem.price * OrderItem.quantity).label("revenue")
+                )
+                .join(Order, Order.id == OrderItem.order_id)
+                .where(Order.status.in_(("paid", "completed")))
+                .group_by(OrderItem.product_id)
+                .order_by(quantity.desc())
+                .limit(limit)
+            )
+            result = await db.execute(query)
+            return [row._asdict() for row in result]
+        except Exception as e:
+            logger.error(f"Failed to get top products: {e}")
+            raise
+
+    async def get_stats(self, db: AsyncSession) -> Dict[str, Any]:
+        """
+        Get admin dashboard aggregates, cached for STATS_CACHE_TTL seconds
+
+        Returns:
+            Dict with total_users, total_orders, total_revenue, pending_orders
+            and top_products (best sellers, see get_top_products)
+        """
+        stats = self._stats_cache.get("stats")
+        if stats is not None:
+            return stats
+
+        try:
+            # Users count, orders count, paid revenue and pending orders
+            # in a single round-trip (one scan of orders with FILTER aggregates)
+            query = select(
+                select(func.count(User.id)).scalar_subquery().label("total_users"),
+                func.count(Order.id).label("total_orders"),
+                func.coalesce(func.sum(Order.amount).filter(Order.status == "paid"), 0).label("total_revenue"),
+                func.count(Order.id).filter(Order.status == "pending").label("pending_orders")
+            ).select_from(Order)
+            result = await db.execute(query)
+            stats = result.one()._asdict()
+        except Exception as e:
+            logger.error(f"Failed to get stats: {e}")
+            raise
+
+        # Cached in the same entry, so invalidate_stats() drops both
+        stats["top_products"] = await self.get_top_products(db, limit=STATS_TOP_PRODUCTS)
+
+        self._stats_cache["stats"] = stats
+        return stats
+
+    def invalidate_stats(self) -> None:
+        """Drop cached dashboard aggregates after an order change"""
+        self._stats_cache.clear()
+
 
 # Singleton instance
 order_service = OrderService()
@@ -0,0 +1,59 @@
+"""
+Telegram file_id cache for product photos
+
+Telegram downloads a photo URL on every send; once uploaded, the returned
+file_id can be reused instantly. Mappings live in Redis (shared with the
+cart connection) and are mirrored in process memory.
+"""
+from typing import Dict, Optional
+
+from app.services.cart import cart_service
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Redis hash: image URL -> Telegram file_id, no expiry
+PHOTO_CACHE_KEY = "tg:photo"
+
+
+class PhotoCacheService:
+    """Service mapping image URLs to Telegram file_ids"""
+
+    def __init__(self):
+        self._file_ids: Dict[str, str] = {}
+
+    async def get_file_id(self, url: str) -> Optional[str]:
+        """Get cached file_id for an image URL"""
+        file_id = self._file_ids.get(url)
+        if file_id is not None:
+            return file_id
+
+        try:
+            file_id = await cart_service.redis_client.hget(PHOTO_CACHE_KEY, url)
+        except Exception as e:
+            logger.error(f"Failed to read photo cache: {e}")
+            return None
+
+        if file_id:
+            self._file_ids[url] = file_id
+        return file_id
+
+    async def remember(self, url: str, file_id: str) -> None:
+        """Store file_id returned by Telegram for an image URL"""
+        self._file_ids[url] = file_id
+        try:
+            await cart_service.redis_client.hset(PHOTO_CACHE_KEY, url, file_id)
+        except Exception as e:
+            logger.error(f"Failed to write photo cache: {e}")
+
+    async def forget(self, url: str) -> None:
+        """Drop a file_id Telegram no longer accepts"""
+        self._file_ids.pop(url, None)
+        try:
+            await cart_service.redis_client.hdel(PHOTO_CACHE_KEY, url)
+        except Exception as e:
+            logger.error(f"Failed to clear photo cache: {e}")
+
+
+# Global instance
+photo_cache_service = PhotoCacheService()
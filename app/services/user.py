@@ -1,20 +1,40 @@
 """
 User management service
 """
-from typing import Optional, Dict, Any
-from datetime import datetime
-from sqlalchemy import select, update
+import asyncio
+from typing import AsyncIterator, Optional, Dict, Any, Tuple
+from sqlalchemy import func, lambda_stmt, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from cachetools import TTLCache
 
 from app.database.models import User
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Seconds a user returned by get_or_create_user is reused for repeated /start
+USER_CACHE_TTL = 300
+
+
+def _is_outdated(user: User, username: str, first_name: str, last_name: str) -> bool:
+    """Check whether stored Telegram profile differs from the given one"""
+    return bool(
+        (username and user.username != username)
+        or (first_name and user.first_name != first_name)
+        or (last_name and user.last_name != last_name)
+    )
+
 
 class UserService:
     """Service for managing bot users"""
 
+    def __init__(self):
+        # User rows from get_or_create_user, evicted whenever the row is updated
+        self._user_cache = TTLCache(maxsize=10000, ttl=USER_CACHE_TTL)
+        self._user_locks: Dict[int, asyncio.Lock] = {}
+        # Coroutines holding or waiting for each user's lock
+        self._user_lock_waiters: Dict[int, int] = {}
+
     async def get_or_create_user(
         self,
         db: AsyncSession,
@@ -36,21 +56,54 @@ class UserService:
         Returns:
             User object
         """
+        cached = self._user_cache.get(user_id)
+        if cached is not None and not _is_outdated(cached, username, first_name, last_name):
+            return cached
+
+        # Double-tapped /start shares one lookup instead of racing to insert
+        lock = self._user_locks.setdefault(user_id, asyncio.Lock())
+        self._user_lock_waiters[user_id] = self._user_lock_waiters.get(user_id, 0) + 1
+        try:
+            async with lock:
+                cached = self._user_cache.get(user_id)
+                if cached is not None and not _is_outdated(cached, username, first_name, last_name):
+                    return cached
+
+                user = await self._get_or_create_user(db, user_id, username, first_name, last_name)
+                self._user_cache[user_id] = user
+                return user
+        finally:
+            # A released lock may still have waiters that haven't woken up yet;
+            # drop it only when nobody else holds or waits for it
+            waiters = self._user_lock_waiters[user_id] - 1
+            if waiters:
+                self._user_lock_waiters[user_id] = waiters
+            else:
+                del self._user_lock_waiters[user_id]
+                self._user_locks.pop(user_id, None)
+
+    async def _get_or_create_user(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        username: str,
+        first_name: str,
+        last_name: str
+    ) -> User:
+        """Read user from the database, refreshing or creating the row"""
         try:
-            # Try to get existing user
-            query = select(User).where(User.id == user_id)
+            # Try to get existing user (runs on every /start, so the
+            # statement is cached and only user_id is re-bound)
+            query = lambda_stmt(lambda: select(User).where(User.id == user_id))
             result = await db.execute(query)
             user = result.scalar_one_or_none()
 
             if user:
                 # Update user info if changed
-                if (username and user.username != username) or \
-                   (first_name and user.first_name != first_name) or \
-                   (last_name and user.last_name != last_name):
+                if _is_outdated(user, username, first_name, last_name):
                     user.username = username
                     user.first_name = first_name
                     user.last_name = last_name
-                    user.updated_at = datetime.utcnow()
                     await db.commit()
                     await db.refresh(user)
 
@@ -79,7 +132,7 @@ class UserService:
     async def get_user(self, db: AsyncSession, user_id: int) -> Optional[User]:
         """Get user by ID"""
         try:
-            query = select(User).where(User.id == user_id)
+            query = lambda_stmt(lambda: select(User).where(User.id == user_id))
             result = await db.execute(query)
             return result.scalar_one_or_none()
         except Exception as e:
@@ -97,10 +150,11 @@ class UserService:
             query = (
                 update(User)
                 .where(User.id == user_id)
-                .values(phone=phone, updated_at=datetime.utcnow())
+                .values(phone=phone)
             )
             await db.execute(query)
             await db.commit()
+            self._user_cache.pop(user_id, None)
 
             logger.info(f"Updated phone for user {user_id}")
             return True
@@ -121,10 +175,11 @@ class UserService:
             query = (
                 update(User)
                 .where(User.id == user_id)
-                .values(email=email, updated_at=datetime.utcnow())
+                .values(email=email)
             )
             await db.execute(query)
             await db.commit()
+            self._user_cache.pop(user_id, None)
 
             logger.info(f"Updated email for user {user_id}")
             return True
@@ -145,10 +200,11 @@ class UserService:
             query = (
                 update(User)
                 .where(User.id == user_id)
-                .values(opencart_customer_id=opencart_customer_id, updated_at=datetime.utcnow())
+                .values(opencart_customer_id=opencart_customer_id)
             )
             await db.execute(query)
             await db.commit()
+            self._user_cache.pop(user_id, None)
 
             logger.info(f"Linked user {user_id} to OpenCart customer {opencart_customer_id}")
             return True
@@ -168,6 +224,36 @@ class UserService:
             logger.error(f"Failed to get all users: {e}")
             return []
 
+    async def get_recent_users_with_total(
+        self,
+        db: AsyncSession,
+        limit: int = 10
+    ) -> Tuple[int, list[User]]:
+        """Get latest users and total users count in one query (for admin)"""
+        try:
+            # COUNT(*) OVER () is evaluated before LIMIT, so it counts all users
+            query = (
+                select(User, func.count().over().label("total"))
+                .order_by(User.created_at.desc())
+                .limit(limit)
+            )
+            result = await db.execute(query)
+            rows = result.all()
+            total = rows[0].total if rows else 0
+            return total, [row.User for row in rows]
+        except Exception as e:
+            logger.error(f"Failed to get recent users: {e}")
+            return 0, []
+
+    async def stream_user_ids(self, db: AsyncSession) -> AsyncIterator[int]:
+        """Yield IDs of all users without loading the whole table into memory"""
+        try:
+            result = await db.stream_scalars(select(User.id))
+            async for user_id in result:
+                yield user_id
+        except Exception as e:
+            logger.error(f"Failed to stream user IDs: {e}")
+
 
 # Singleton instance
 user_service = UserService()
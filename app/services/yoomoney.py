@@ -3,12 +3,16 @@ YooMoney payment integration service
 """
 import time
 from typing import Dict, Optional
+from cachetools import LRUCache, TTLCache
 from yoomoney import Client, Quickpay
 from config import settings
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Seconds a "not paid yet" answer is reused for repeated "check payment" taps
+PENDING_STATUS_TTL = 5
+
 
 class YooMoneyService:
     """Service for YooMoney payment processing"""
@@ -17,6 +21,9 @@ class YooMoneyService:
         self.token = settings.YOOMONEY_TOKEN
         self.wallet = settings.YOOMONEY_WALLET
         self.client = None
+        self._pending_cache = TTLCache(maxsize=1024, ttl=PENDING_STATUS_TTL)
+        # A confirmed payment never changes, keep it until evicted
+        self._success_cache = LRUCache(maxsize=1024)
 
         if self.token:
             try:
@@ -67,6 +74,9 @@ class YooMoneyService:
         """
         Check payment status by label
 
+        Confirmed payments are cached, pending answers for PENDING_STATUS_TTL
+        seconds; errors are never cached.
+
         Args:
             label: Payment label
 
@@ -77,6 +87,10 @@ class YooMoneyService:
             logger.error("YooMoney client not initialized")
             return {"status": "error", "message": "Payment service not configured"}
 
+        cached = self._success_cache.get(label) or self._pending_cache.get(label)
+        if cached is not None:
+            return cached
+
         try:
             # Get operation history filtered by label
             history = self.client.operation_history(label=label)
@@ -87,16 +101,20 @@ class YooMoneyService:
                     if operation.status == "success" and operation.label == label:
                         logger.info(f"Payment confirmed: {label} - {operation.amount} RUB")
 
-                        return {
+                        result = {
                             "status": "success",
                             "amount": float(operation.amount),
                             "datetime": operation.datetime,
                             "operation_id": operation.operation_id,
                             "sender": getattr(operation, "sender", None)
                         }
+                        self._success_cache[label] = result
+                        return result
 
             # Payment not found or not successful yet
-            return {"status": "pending"}
+            result = {"status": "pending"}
+            self._pending_cache[label] = result
+            return result
 
         except Exception as e:
             logger.error(f"Failed to check payment: {e}")
@@ -0,0 +1,16 @@
+"""
+Parsers for the fixed-format callback payloads ("prod:<id>", "catpage:<id>:<page>", ...)
+"""
+from typing import Tuple
+
+
+def parse_id(data: str) -> int:
+    """Return the trailing integer of a payload like "prod:42" or "admin:reply:42" """
+    return int(data.rpartition(":")[2])
+
+
+def parse_id_page(data: str) -> Tuple[int, int]:
+    """Return (id, page) from a payload like "catpage:42:3" """
+    _, _, rest = data.partition(":")
+    item_id, _, page = rest.partition(":")
+    return int(item_id), int(page)
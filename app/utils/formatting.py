@@ -1,11 +1,14 @@
 """
 Text formatting utilities for Telegram messages
 """
+from functools import lru_cache
 from typing import List, Dict, Any
 from datetime import datetime
 import re
 import html
 
+EMPTY_CART_TEXT = "🛒 <b>Ваша корзина пуста</b>\n\nДобавьте товары из каталога."
+
 
 def clean_html(text: str) -> str:
     """Remove HTML tags and decode entities, safe for Telegram HTML parse_mode"""
@@ -67,8 +70,9 @@ def smart_truncate(text: str, max_length: int = 300) -> tuple:
     return truncated + '...', True
 
 
+@lru_cache(maxsize=2048)
 def format_price(price: float) -> str:
-    """Format price with currency symbol"""
+    """Format price with currency symbol (memoized: cart prices repeat across renders)"""
     return f"{price:,.2f}₽"
 
 
@@ -86,21 +90,12 @@ def format_product_name(name: str, max_length: int = 40) -> str:
 
 def format_cart_item(item: Dict[str, Any]) -> str:
     """Format cart item for display"""
+    # cart_service.get_cart always returns product dicts from OpenCart
     product = item["product"]
-    quantity = item["quantity"]
-    subtotal = item["subtotal"]
-
-    # Handle both dict and object access for product
-    if isinstance(product, dict):
-        name = product.get("name", "Товар")
-        price = product.get("price", 0)
-    else:
-        name = product.name
-        price = product.price
 
     return (
-        f"• {name}\n"
-        f"  {format_price(price)} × {quantity} = {format_price(subtotal)}"
+        f"• {product['name']}\n"
+        f"  {format_price(product['price'])} × {item['quantity']} = {format_price(item['subtotal'])}"
     )
 
 
@@ -120,13 +115,13 @@ def format_cart_summary(cart: Dict[str, Any]) -> str:
     )
 
 
-def format_order_items(items: List[Dict[str, Any]]) -> str:
-    """Format order items for display"""
+def format_order_items(items) -> str:
+    """Format order items (OrderItem rows) for display"""
     result = []
     for item in items:
         result.append(
-            f"• {item['name']}\n"
-            f"  {format_price(item['price'])} × {item['quantity']} = {format_price(item['price'] * item['quantity'])}"
+            f"• {item.name}\n"
+            f"  {format_price(item.price)} × {item.quantity} = {format_price(item.price * item.quantity)}"
         )
     return "\n".join(result)
 
@@ -153,32 +148,34 @@ def format_order_summary(order) -> str:
 💰 <b>Итого: {format_price(order.amount)}</b>
 
 📅 <b>Дата создания:</b> {format_date(order.created_at)}
-📊 <b>Статус:</b> {get_status_emoji(order.status)} {get_status_text(order.status)}
+📊 <b>Статус:</b> {' '.join(get_status_display(order.status))}
 """
 
 
+# Order status -> (emoji, Russian text)
+ORDER_STATUSES = {
+    "pending": ("⏳", "Ожидает оплаты"),
+    "paid": ("✅", "Оплачен"),
+    "cancelled": ("❌", "Отменен"),
+    "refunded": ("💸", "Возврат средств"),
+    "completed": ("🎉", "Выполнен")
+}
+UNKNOWN_STATUS = ("❓", "Неизвестно")
+
+
+def get_status_display(status: str) -> tuple:
+    """Get (emoji, text) pair for order status with one lookup"""
+    return ORDER_STATUSES.get(status, UNKNOWN_STATUS)
+
+
 def get_status_emoji(status: str) -> str:
     """Get emoji for order status"""
-    status_emojis = {
-        "pending": "⏳",
-        "paid": "✅",
-        "cancelled": "❌",
-        "refunded": "💸",
-        "completed": "🎉"
-    }
-    return status_emojis.get(status, "❓")
+    return get_status_display(status)[0]
 
 
 def get_status_text(status: str) -> str:
     """Get Russian text for order status"""
-    status_texts = {
-        "pending": "Ожидает оплаты",
-        "paid": "Оплачен",
-        "cancelled": "Отменен",
-        "refunded": "Возврат средств",
-        "completed": "Выполнен"
-    }
-    return status_texts.get(status, "Неизвестно")
+    return get_status_display(status)[1]
 
 
 def escape_markdown(text: str) -> str:
@@ -0,0 +1,166 @@
+"""
+Helpers for updating bot messages in place
+"""
+import asyncio
+from typing import Awaitable, Dict, Tuple
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import CallbackQuery, InlineKeyboardMarkup, InputMediaPhoto, Message
+from cachetools import TTLCache
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Minimum seconds between edits of one message; faster edits are coalesced
+EDIT_INTERVAL = 1.0
+
+# (chat_id, message_id) of recently edited messages
+_recent_edits = TTLCache(maxsize=10000, ttl=EDIT_INTERVAL)
+# Latest edit waiting for the interval to pass, per message
+_pending_edits: Dict[Tuple[int, int], tuple] = {}
+# Strong references to deferred edit tasks
+_flush_tasks: set[asyncio.Task] = set()
+
+
+def is_unchanged(message: Message, text: str, reply_markup: InlineKeyboardMarkup | None) -> bool:
+    """Check whether message already shows this text and keyboard"""
+    # Telegram strips surrounding whitespace, html_text restores the formatting
+    return (
+        message.text is not None
+        and message.reply_markup == reply_markup
+        and message.html_text == text.strip()
+    )
+
+
+async def safe_edit_text(
+    message: Message,
+    text: str,
+    reply_markup: InlineKeyboardMarkup | None = None,
+    parse_mode: str = "HTML"
+) -> None:
+    """
+    Edit message text, skipping the API call when nothing would change
+
+    Edits of the same message closer than EDIT_INTERVAL apart are deferred,
+    and only the latest one is sent, so rapid paging can't hit flood limits.
+    """
+    if is_unchanged(message, text, reply_markup):
+        return
+
+    key = (message.chat.id, message.message_id)
+    if key in _recent_edits:
+        if key not in _pending_edits:
+            task = asyncio.create_task(_flush_edit(key))
+            _flush_tasks.add(task)
+            task.add_done_callback(_flush_tasks.discard)
+        _pending_edits[key] = (message, text, reply_markup, parse_mode)
+        return
+
+    _recent_edits[key] = True
+    await _edit_text(message, text, reply_markup, parse_mode)
+
+
+async def _edit_text(
+    message: Message,
+    text: str,
+    reply_markup: InlineKeyboardMarkup | None,
+    parse_mode: str
+) -> None:
+    """
+    Edit message text, ignoring Telegram's "message is not modified" error
+
+    When only the keyboard differs (e.g. catalog paging), just the markup is sent.
+    """
+    try:
+        if message.text is not None and message.html_text == text.strip():
+            await message.edit_reply_markup(reply_markup=reply_markup)
+        else:
+            await message.edit_text(text, reply_markup=reply_markup, parse_mode=parse_mode)
+    except TelegramBadRequest as e:
+        if "message is not modified" not in str(e):
+            raise
+
+
+async def _flush_edit(key: Tuple[int, int]) -> None:
+    """Send the latest deferred edit of a message once the interval has passed"""
+    await asyncio.sleep(EDIT_INTERVAL)
+    message, text, reply_markup, parse_mode = _pending_edits.pop(key)
+    _recent_edits[key] = True
+    try:
+        await _edit_text(message, text, reply_markup, parse_mode)
+    except Exception as e:
+        logger.warning("Deferred edit of message {} failed: {}", key[1], e)
+
+
+async def _delete_quietly(message: Message) -> None:
+    """Delete message, ignoring ones that are already gone or too old"""
+    try:
+        await message.delete()
+    except TelegramBadRequest as e:
+        logger.debug("Could not delete message {}: {}", message.message_id, e)
+
+
+async def replace_message(message: Message, send: Awaitable[Message]) -> Message:
+    """Delete message and send its replacement concurrently"""
+    _, sent = await asyncio.gather(_delete_quietly(message), send)
+    return sent
+
+
+async def render_response(
+    callback: CallbackQuery,
+    text: str,
+    keyboard: InlineKeyboardMarkup | None = None,
+    *,
+    photo: str | None = None,
+    parse_mode: str = "HTML"
+) -> Message | None:
+    """
+    Show text (or a photo with caption) in place of the callback's message
+
+    Text can't replace a photo message and vice versa, so in that case the
+    message is deleted and a new one is sent.
+
+    Args:
+        callback: Callback query whose message is updated
+        text: Message text or photo caption
+        keyboard: Inline keyboard to attach
+        photo: Photo URL or Telegram file_id, text-only message when None
+        parse_mode: Telegram parse mode
+
+    Returns:
+        The photo message when a photo was shown, otherwise None
+    """
+    message = callback.message
+    has_photo = bool(message.photo)
+
+    if photo:
+        try:
+            if has_photo:
+                sent = await message.edit_media(
+                    media=InputMediaPhoto(media=photo, caption=text, parse_mode=parse_mode),
+                    reply_markup=keyboard
+                )
+            else:
+                sent = await replace_message(message, message.answer_photo(
+                    photo=photo,
+                    caption=text,
+                    reply_markup=keyboard,
+                    parse_mode=parse_mode
+                ))
+            return sent if isinstance(sent, Message) else None
+        except Exception as img_error:
+            logger.warning("Failed to send photo: {}", img_error)
+            # Fallback to text-only
+            try:
+                await message.edit_text(text, reply_markup=keyboard, parse_mode=parse_mode)
+            except TelegramBadRequest:
+                # Can't edit, send new message
+                await replace_message(message, message.answer(text, reply_markup=keyboard, parse_mode=parse_mode))
+            return None
+
+    if has_photo:
+        await replace_message(message, message.answer(text, reply_markup=keyboard, parse_mode=parse_mode))
+    else:
+        await safe_edit_text(message, text, keyboard, parse_mode)
+    return None
@@ -1,9 +1,8 @@
 """
 OpenCart database connection configuration
 """
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
-from config.settings import OPENCART_DB_URL
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from config.settings import OPENCART_DB_URL, DB_POOL_RECYCLE
 
 # Create async engine for OpenCart database (read-only)
 opencart_engine = create_async_engine(
@@ -11,14 +10,17 @@ opencart_engine = create_async_engine(
     echo=False,
     pool_pre_ping=True,
     pool_size=10,
-    max_overflow=20
+    max_overflow=20,
+    # Recycle before MySQL's wait_timeout closes idle connections
+    pool_recycle=DB_POOL_RECYCLE
 )
 
 # Session factory for OpenCart database
-OpenCartSessionLocal = sessionmaker(
+# Read-only access: nothing is ever added or modified, so autoflush is disabled
+OpenCartSessionLocal = async_sessionmaker(
     opencart_engine,
-    class_=AsyncSession,
-    expire_on_commit=False
+    expire_on_commit=False,
+    autoflush=False
 )
 
 
@@ -13,7 +13,11 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 # Telegram Bot
 BOT_TOKEN = os.getenv("BOT_TOKEN")
-ADMIN_IDS = [int(id.strip()) for id in os.getenv("ADMIN_IDS", "").split(",") if id.strip()]
+ADMIN_IDS = frozenset(int(id.strip()) for id in os.getenv("ADMIN_IDS", "").split(",") if id.strip())
+
+# Telegram Bot API HTTP client
+BOT_HTTP_POOL_LIMIT = int(os.getenv("BOT_HTTP_POOL_LIMIT", "100"))  # simultaneous connections
+BOT_HTTP_TIMEOUT = float(os.getenv("BOT_HTTP_TIMEOUT", "10"))  # seconds per API request
 
 # OpenCart Configuration
 OPENCART_URL = os.getenv("OPENCART_URL", "https://wifiobd.ru")
@@ -24,6 +28,8 @@ OPENCART_URL = os.getenv("OPENCART_URL", "https://wifiobd.ru")
 # Then get the Username and Key (not token!)
 OPENCART_API_USERNAME = os.getenv("OPENCART_API_USERNAME", "")
 OPENCART_API_KEY = os.getenv("OPENCART_API_KEY", "")
+OPENCART_HTTP_POOL_LIMIT = int(os.getenv("OPENCART_HTTP_POOL_LIMIT", "20"))  # simultaneous connections
+OPENCART_HTTP_TIMEOUT = float(os.getenv("OPENCART_HTTP_TIMEOUT", "15"))  # seconds per API request
 
 # OpenCart Database (read-only access)
 OPENCART_DB_HOST = os.getenv("OPENCART_DB_HOST", "localhost")
@@ -43,6 +49,14 @@ DB_PASSWORD = os.getenv("DB_PASSWORD", "")
 DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 OPENCART_DB_URL = f"mysql+aiomysql://{OPENCART_DB_USER}:{OPENCART_DB_PASSWORD}@{OPENCART_DB_HOST}:{OPENCART_DB_PORT}/{OPENCART_DB_NAME}"
 
+# Bot database connection pool
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "25"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "25"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "600"))  # seconds
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))  # seconds
+DB_PREPARED_STATEMENT_CACHE_SIZE = int(os.getenv("DB_PREPARED_STATEMENT_CACHE_SIZE", "500"))
+DB_QUERY_CACHE_SIZE = int(os.getenv("DB_QUERY_CACHE_SIZE", "1200"))  # compiled SQL cache entries
+
 # Redis
 REDIS_HOST = os.getenv("REDIS_HOST", "redis")
 REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))